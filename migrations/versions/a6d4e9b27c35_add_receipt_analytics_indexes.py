@@ -0,0 +1,34 @@
+"""Add composite indexes for receipt analytics filters
+
+Revision ID: a6d4e9b27c35
+Revises: f3c1a8e07d54
+Create Date: 2026-10-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d4e9b27c35'
+down_revision = 'f3c1a8e07d54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('receipts', schema=None) as batch_op:
+        batch_op.create_index('ix_receipts_user_issued_id_status', ['user_id', 'issued_at', 'id', 'status'], unique=False)
+        batch_op.create_index('ix_receipts_issued_status', ['issued_at', 'status'], unique=False)
+
+    with op.batch_alter_table('receipt_line_items', schema=None) as batch_op:
+        batch_op.create_index('ix_receipt_line_items_receipt_category_price', ['receipt_id', 'category_id', 'total_price'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('receipt_line_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_receipt_line_items_receipt_category_price')
+
+    with op.batch_alter_table('receipts', schema=None) as batch_op:
+        batch_op.drop_index('ix_receipts_issued_status')
+        batch_op.drop_index('ix_receipts_user_issued_id_status')
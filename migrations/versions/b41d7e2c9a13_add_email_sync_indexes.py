@@ -0,0 +1,37 @@
+"""Add indexes on email sync lookup columns
+
+Revision ID: b41d7e2c9a13
+Revises: f8c9d4e5f6a7
+Create Date: 2026-10-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41d7e2c9a13'
+down_revision = 'f8c9d4e5f6a7'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_email_processing_log_user_id', 'email_processing_log', ['user_id']),
+    ('ix_email_processing_log_amazon_order_id', 'email_processing_log', ['amazon_order_id']),
+    ('ix_amazon_orders_email_message_id', 'amazon_orders', ['email_message_id']),
+]
+
+
+def upgrade():
+    # CONCURRENTLY keeps PostgreSQL tables writable during the build but cannot
+    # run inside a transaction; other dialects ignore the flag.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,44 @@
+"""Add denormalized shop name/address to receipts
+
+Revision ID: b8e5f2a91d46
+Revises: a6d4e9b27c35
+Create Date: 2026-10-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e5f2a91d46'
+down_revision = 'a6d4e9b27c35'
+branch_labels = None
+depends_on = None
+
+
+# Receipts updated per backfill statement, keeps each UPDATE short-lived
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade():
+    with op.batch_alter_table('receipts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('shop_name_cached', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('shop_address_cached', sa.String(length=255), nullable=True))
+
+    # Backfill in id ranges rather than one table-wide UPDATE
+    conn = op.get_bind()
+    max_id = conn.execute(sa.text('SELECT MAX(id) FROM receipts')).scalar() or 0
+    backfill = sa.text("""
+        UPDATE receipts
+        SET shop_name_cached = (SELECT name FROM shops WHERE shops.id = receipts.shop_id),
+            shop_address_cached = (SELECT address FROM shops WHERE shops.id = receipts.shop_id)
+        WHERE shop_id IS NOT NULL AND id > :start AND id <= :end
+    """)
+    for start in range(0, max_id, BACKFILL_BATCH_SIZE):
+        conn.execute(backfill, {'start': start, 'end': start + BACKFILL_BATCH_SIZE})
+
+
+def downgrade():
+    with op.batch_alter_table('receipts', schema=None) as batch_op:
+        batch_op.drop_column('shop_address_cached')
+        batch_op.drop_column('shop_name_cached')
@@ -0,0 +1,33 @@
+"""Add partial index for uncategorized Amazon items
+
+Revision ID: c5e8a1f04b27
+Revises: b41d7e2c9a13
+Create Date: 2026-10-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8a1f04b27'
+down_revision = 'b41d7e2c9a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves /stats/uncategorized: only rows without a category, ordered by price
+    with op.batch_alter_table('amazon_order_items', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_amazon_order_items_category_null',
+            [sa.text('total_price DESC')],
+            unique=False,
+            postgresql_where=sa.text('category_id IS NULL'),
+            sqlite_where=sa.text('category_id IS NULL'),
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('amazon_order_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_amazon_order_items_category_null')
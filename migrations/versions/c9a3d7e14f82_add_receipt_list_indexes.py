@@ -0,0 +1,28 @@
+"""Add composite indexes for receipt list filters
+
+Revision ID: c9a3d7e14f82
+Revises: b8e5f2a91d46
+Create Date: 2026-10-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9a3d7e14f82'
+down_revision = 'b8e5f2a91d46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('receipts', schema=None) as batch_op:
+        batch_op.create_index('ix_receipts_status_issued', ['status', 'issued_at'], unique=False)
+        batch_op.create_index('ix_receipts_shop_issued', ['shop_id', 'issued_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('receipts', schema=None) as batch_op:
+        batch_op.drop_index('ix_receipts_shop_issued')
+        batch_op.drop_index('ix_receipts_status_issued')
@@ -0,0 +1,44 @@
+"""Add denormalized item_count to amazon_orders
+
+Revision ID: d7a2f3b85c61
+Revises: c5e8a1f04b27
+Create Date: 2026-10-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a2f3b85c61'
+down_revision = 'c5e8a1f04b27'
+branch_labels = None
+depends_on = None
+
+
+# Orders updated per backfill statement, keeps each UPDATE short-lived
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade():
+    with op.batch_alter_table('amazon_orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('item_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill in id ranges rather than one table-wide UPDATE
+    conn = op.get_bind()
+    max_id = conn.execute(sa.text('SELECT MAX(id) FROM amazon_orders')).scalar() or 0
+    backfill = sa.text("""
+        UPDATE amazon_orders
+        SET item_count = (
+            SELECT COUNT(*) FROM amazon_order_items
+            WHERE amazon_order_items.amazon_order_id = amazon_orders.id
+        )
+        WHERE id > :start AND id <= :end
+    """)
+    for start in range(0, max_id, BACKFILL_BATCH_SIZE):
+        conn.execute(backfill, {'start': start, 'end': start + BACKFILL_BATCH_SIZE})
+
+
+def downgrade():
+    with op.batch_alter_table('amazon_orders', schema=None) as batch_op:
+        batch_op.drop_column('item_count')
@@ -0,0 +1,43 @@
+"""Add indexes for Amazon spending stats
+
+Revision ID: e2b9c4d61f08
+Revises: d7a2f3b85c61
+Create Date: 2026-10-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b9c4d61f08'
+down_revision = 'd7a2f3b85c61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('amazon_orders', schema=None) as batch_op:
+        batch_op.create_index('ix_amazon_orders_order_date', ['order_date'], unique=False)
+
+    if op.get_context().dialect.name == 'postgresql':
+        op.create_index(
+            'ix_amazon_orders_year_month',
+            'amazon_orders',
+            [sa.text("date_trunc('month', order_date)")],
+            unique=False,
+        )
+
+    with op.batch_alter_table('amazon_order_items', schema=None) as batch_op:
+        batch_op.create_index('ix_amazon_order_items_category_price', ['category_id', 'total_price'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('amazon_order_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_amazon_order_items_category_price')
+
+    if op.get_context().dialect.name == 'postgresql':
+        op.drop_index('ix_amazon_orders_year_month', table_name='amazon_orders')
+
+    with op.batch_alter_table('amazon_orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_amazon_orders_order_date')
@@ -0,0 +1,50 @@
+"""Add amazon_product_stats summary table
+
+Revision ID: f3c1a8e07d54
+Revises: e2b9c4d61f08
+Create Date: 2026-10-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c1a8e07d54'
+down_revision = 'e2b9c4d61f08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('amazon_product_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('item_name', sa.String(length=255), nullable=False),
+        sa.Column('asin', sa.String(length=50), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('total_spent', sa.Float(), nullable=False),
+        sa.Column('total_quantity', sa.Float(), nullable=False),
+        sa.Column('purchase_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('amazon_product_stats', schema=None) as batch_op:
+        batch_op.create_index('ix_amazon_product_stats_total_spent', ['total_spent'], unique=False)
+        batch_op.create_index('ix_amazon_product_stats_category_spent', ['category_id', 'total_spent'], unique=False)
+
+    # Seed from existing items; later imports rebuild it
+    op.execute("""
+        INSERT INTO amazon_product_stats
+            (item_name, asin, category_id, total_spent, total_quantity, purchase_count)
+        SELECT item_name, asin, category_id, SUM(total_price), SUM(quantity), COUNT(id)
+        FROM amazon_order_items
+        GROUP BY item_name, asin, category_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('amazon_product_stats', schema=None) as batch_op:
+        batch_op.drop_index('ix_amazon_product_stats_category_spent')
+        batch_op.drop_index('ix_amazon_product_stats_total_spent')
+
+    op.drop_table('amazon_product_stats')
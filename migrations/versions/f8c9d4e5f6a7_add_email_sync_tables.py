@@ -53,18 +53,37 @@ def upgrade():
     )
     
     # Add new columns to amazon_orders
-    with op.batch_alter_table('amazon_orders') as batch_op:
-        batch_op.add_column(sa.Column('source_type', sa.String(50), server_default='csv', nullable=True))
-        batch_op.add_column(sa.Column('email_message_id', sa.String(255), nullable=True))
-        batch_op.add_column(sa.Column('raw_email_html', sa.Text(), nullable=True))
+    if op.get_context().dialect.name == 'sqlite':
+        # SQLite has no multi-column ALTER; nullable columns are added in place
+        with op.batch_alter_table('amazon_orders', recreate='never') as batch_op:
+            batch_op.add_column(sa.Column('source_type', sa.String(50), server_default='csv', nullable=True))
+            batch_op.add_column(sa.Column('email_message_id', sa.String(255), nullable=True))
+            batch_op.add_column(sa.Column('raw_email_html', sa.Text(), nullable=True))
+    else:
+        # Single ALTER TABLE so the table is only rewritten/locked once
+        op.execute(
+            "ALTER TABLE amazon_orders "
+            "ADD COLUMN source_type VARCHAR(50) DEFAULT 'csv', "
+            "ADD COLUMN email_message_id VARCHAR(255), "
+            "ADD COLUMN raw_email_html TEXT"
+        )
 
 
 def downgrade():
     # Remove columns from amazon_orders
-    with op.batch_alter_table('amazon_orders') as batch_op:
-        batch_op.drop_column('raw_email_html')
-        batch_op.drop_column('email_message_id')
-        batch_op.drop_column('source_type')
+    if op.get_context().dialect.name == 'sqlite':
+        # All three drops are applied in a single table recreate
+        with op.batch_alter_table('amazon_orders') as batch_op:
+            batch_op.drop_column('raw_email_html')
+            batch_op.drop_column('email_message_id')
+            batch_op.drop_column('source_type')
+    else:
+        op.execute(
+            "ALTER TABLE amazon_orders "
+            "DROP COLUMN raw_email_html, "
+            "DROP COLUMN email_message_id, "
+            "DROP COLUMN source_type"
+        )
     
     # Drop tables
     op.drop_table('email_processing_log')
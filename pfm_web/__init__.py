@@ -3,14 +3,15 @@ from __future__ import annotations
 
 import logging
 import os
+from functools import lru_cache
 from pathlib import Path
 
 from dotenv import load_dotenv
 from flask import Flask
 
-from .config import adjust_sqlite_connect_args, get_config
-from .extensions import db, migrate
-from . import importers  # noqa: E402  # CLI helpers
+from .config import adjust_pool_options, adjust_sqlite_connect_args, get_config
+from .extensions import cache, db, migrate
+from .json_provider import init_app as init_json_provider
 
 
 def create_app(config_name: str | None = None) -> Flask:
@@ -20,14 +21,19 @@ def create_app(config_name: str | None = None) -> Flask:
     config_class = get_config(config_name)
     config_obj = config_class()
     adjust_sqlite_connect_args(config_obj)
+    adjust_pool_options(config_obj)
 
     app = Flask(__name__)
     app.config.from_object(config_obj)
+    init_json_provider(app)
 
     config_obj.init_app(app)
 
     _init_extensions(app)
-    _register_blueprints(app)
+    # Minimal apps (PFM_MINIMAL=1, for CLI commands) skip the HTTP blueprints
+    # and their import chain
+    if not app.config.get("MINIMAL"):
+        _register_blueprints(app)
     _configure_logging(app)
     _register_shellcontext(app)
     _register_template_filters(app)
@@ -43,8 +49,12 @@ def _load_environment() -> None:
 
 
 def _init_extensions(app: Flask) -> None:
+    from . import models  # noqa: F401  # register tables even without blueprints
+    from . import analytics  # noqa: F401  # commits must invalidate cached analytics
+
     db.init_app(app)
     migrate.init_app(app, db)
+    cache.init_app(app)
 
 
 def _register_blueprints(app: Flask) -> None:
@@ -78,30 +88,33 @@ def _register_template_filters(app: Flask) -> None:
     def currency_filter(value, currency_code="USD"):
         if value is None:
             return "--"
-        try:
-            amount = float(value)
-        except (TypeError, ValueError):
-            return str(value)
+        if isinstance(value, (int, float)):
+            amount = value
+        else:
+            try:
+                amount = float(value)
+            except (TypeError, ValueError):
+                return str(value)
+        formatted = format(amount, ",.2f")
         symbol = _currency_symbol(currency_code)
-        return f"{symbol}{amount:,.2f}" if symbol else f"{amount:,.2f} {currency_code}"
+        return symbol + formatted if symbol else f"{formatted} {currency_code}"
+
+
+_CURRENCY_SYMBOLS = {
+    "USD": "$",
+    "EUR": "€",
+    "GBP": "£",
+    "JPY": "¥",
+}
 
 
+@lru_cache(maxsize=32)
 def _currency_symbol(code: str | None) -> str:
-    if not code:
-        return ""
-    symbols = {
-        "USD": "$",
-        "EUR": "€",
-        "GBP": "£",
-        "JPY": "¥",
-    }
-    return symbols.get(code.upper(), "")
+    return _CURRENCY_SYMBOLS.get(code.upper(), "") if code else ""
 
 
 def _register_cli_commands(app: Flask) -> None:
     import click
-    from . import amazon_importer
-    from .analytics import UnifiedAnalytics
     from .cli.email_sync_commands import init_app as init_email_sync_cli
     
     # Register email sync commands
@@ -110,6 +123,8 @@ def _register_cli_commands(app: Flask) -> None:
     @app.cli.command("import-receipts")
     @click.argument("path", type=click.Path(exists=True, dir_okay=False))
     def import_receipts_command(path: str) -> None:
+        from . import importers
+
         payload = importers.load_receipts_export(Path(path))
         result = importers.import_receipts_export(payload)
         click.echo(
@@ -122,18 +137,23 @@ def _register_cli_commands(app: Flask) -> None:
     @click.argument("csv_path", type=click.Path(exists=True, dir_okay=False))
     def import_amazon_command(csv_path: str) -> None:
         """Import Amazon order history from CSV file."""
+        from . import amazon_importer
+
         result = amazon_importer.import_amazon_csv(Path(csv_path))
         click.echo(
             f"Imported {result.orders_created} orders "
             f"({result.items_created} items, {result.items_categorized} auto-categorized). "
             f"Skipped {result.orders_skipped} duplicates."
         )
+        if result.parse_errors:
+            click.echo(f"Encountered {result.parse_errors} parse errors; see log for details.")
 
     @app.cli.command("spending-summary")
     @click.option("--days", type=int, default=30, help="Number of days to analyze (default: 30)")
     def spending_summary_command(days: int) -> None:
         """Show spending summary combining receipts and Amazon orders."""
         from datetime import datetime, timedelta
+        from .analytics import UnifiedAnalytics
         
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
@@ -166,6 +186,7 @@ def _register_cli_commands(app: Flask) -> None:
     def category_report_command(days: int, limit: int) -> None:
         """Show detailed spending breakdown by category."""
         from datetime import datetime, timedelta
+        from .analytics import UnifiedAnalytics
         
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
@@ -4,13 +4,22 @@
 
 from flask import Blueprint, jsonify, request
 from sqlalchemy import func, extract
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime
 
-from .models import AmazonOrder, AmazonOrderItem, Category
+from .amazon_importer import refresh_product_stats
+from .models import AmazonOrder, AmazonOrderItem, AmazonProductStat, Category
 from .extensions import db
+from .streaming import stream_json_list
 
 amazon_bp = Blueprint('amazon', __name__, url_prefix='/api/amazon')
 
+# Largest page a client may request from the list endpoints
+MAX_LIMIT = 500
+
+# Rows fetched from the database per round trip while streaming a response
+YIELD_PER = 100
+
 
 @amazon_bp.route('/orders', methods=['GET'])
 def list_orders():
@@ -20,10 +29,22 @@ def list_orders():
     Query params:
         - start_date: Filter orders from this date (YYYY-MM-DD)
         - end_date: Filter orders to this date (YYYY-MM-DD)
-        - limit: Max results (default 100)
+        - limit: Max results (default 100, at most MAX_LIMIT)
         - offset: Pagination offset
+        - include: Set to 'items' to embed each order's line items
     """
+    limit = int(request.args.get('limit', 100))
+    offset = int(request.args.get('offset', 0))
+    if limit > MAX_LIMIT:
+        return jsonify({'error': f'limit must not exceed {MAX_LIMIT}'}), 400
+    
+    include_items = 'items' in request.args.get('include', '').split(',')
+    
     query = AmazonOrder.query
+    if include_items:
+        query = query.options(
+            selectinload(AmazonOrder.items).joinedload(AmazonOrderItem.category)
+        )
     
     # Date filters
     if start_date := request.args.get('start_date'):
@@ -31,22 +52,25 @@ def list_orders():
     if end_date := request.args.get('end_date'):
         query = query.filter(AmazonOrder.order_date <= datetime.fromisoformat(end_date))
     
-    # Pagination
-    limit = int(request.args.get('limit', 100))
-    offset = int(request.args.get('offset', 0))
+    orders = query.order_by(
+        AmazonOrder.order_date.desc()
+    ).limit(limit).offset(offset).yield_per(YIELD_PER)
     
-    orders = query.order_by(AmazonOrder.order_date.desc()).limit(limit).offset(offset).all()
+    streamed = 0
     
-    return jsonify({
-        'orders': [
-            {
+    def serialize():
+        nonlocal streamed
+        for o in orders:
+            data = {
                 'id': o.id,
                 'order_number': o.order_number,
                 'order_date': o.order_date.isoformat(),
                 'total_amount': o.total_amount,
                 'currency': o.currency,
-                'item_count': len(o.items),
-                'items': [
+                'item_count': o.item_count,
+            }
+            if include_items:
+                data['items'] = [
                     {
                         'name': item.item_name,
                         'quantity': item.quantity,
@@ -55,10 +79,11 @@ def list_orders():
                     }
                     for item in o.items
                 ]
-            }
-            for o in orders
-        ],
-        'count': len(orders),
+            streamed += 1
+            yield data
+    
+    return stream_json_list('orders', serialize(), lambda: {
+        'count': streamed,
         'limit': limit,
         'offset': offset,
     })
@@ -67,7 +92,9 @@ def list_orders():
 @amazon_bp.route('/orders/<order_number>', methods=['GET'])
 def get_order(order_number: str):
     """Get details of a specific order."""
-    order = AmazonOrder.query.filter_by(order_number=order_number).first_or_404()
+    order = AmazonOrder.query.options(
+        selectinload(AmazonOrder.items).joinedload(AmazonOrderItem.category)
+    ).filter_by(order_number=order_number).first_or_404()
     
     return jsonify({
         'order_number': order.order_number,
@@ -104,6 +131,7 @@ def categorize_item(item_id: int):
     data = request.get_json()
     
     category_id = data.get('category_id')
+    previous_category_id = item.category_id
     if category_id:
         category = Category.query.get_or_404(category_id)
         item.category_id = category.id
@@ -112,6 +140,10 @@ def categorize_item(item_id: int):
     
     db.session.commit()
     
+    # amazon_product_stats is keyed by category, so move the item's totals too
+    if item.category_id != previous_category_id:
+        refresh_product_stats()
+    
     return jsonify({
         'item_id': item.id,
         'category_id': item.category_id,
@@ -119,6 +151,14 @@ def categorize_item(item_id: int):
     })
 
 
+def _order_month_expression():
+    """Truncate AmazonOrder.order_date to the first day of its month."""
+    if db.engine.dialect.name == 'postgresql':
+        # Matches the ix_amazon_orders_year_month expression index
+        return func.date_trunc('month', AmazonOrder.order_date)
+    return func.strftime('%Y-%m-01', AmazonOrder.order_date)
+
+
 @amazon_bp.route('/stats/spending', methods=['GET'])
 def spending_stats():
     """
@@ -131,39 +171,49 @@ def spending_stats():
     group_by = request.args.get('group_by', 'month')
     year = request.args.get('year')
     
-    query = db.session.query(AmazonOrder)
+    # Range predicate on order_date so the index can be used (extract() cannot)
+    filters = []
     if year:
-        query = query.filter(extract('year', AmazonOrder.order_date) == int(year))
+        filters = [
+            AmazonOrder.order_date >= datetime(int(year), 1, 1),
+            AmazonOrder.order_date < datetime(int(year) + 1, 1, 1),
+        ]
     
     if group_by == 'month':
+        period = _order_month_expression().label('period')
         results = db.session.query(
-            extract('year', AmazonOrder.order_date).label('year'),
-            extract('month', AmazonOrder.order_date).label('month'),
+            period,
             func.sum(AmazonOrder.total_amount).label('total'),
             func.count(AmazonOrder.id).label('order_count')
-        ).group_by('year', 'month').order_by('year', 'month').all()
+        ).filter(*filters).group_by(period).order_by(period).all()
+        
+        data = []
+        for r in results:
+            month_start = r.period if isinstance(r.period, datetime) else datetime.fromisoformat(r.period)
+            data.append({
+                'year': month_start.year,
+                'month': month_start.month,
+                'total': float(r.total),
+                'order_count': r.order_count,
+            })
         
         return jsonify({
             'group_by': 'month',
-            'data': [
-                {
-                    'year': int(r.year),
-                    'month': int(r.month),
-                    'total': float(r.total),
-                    'order_count': r.order_count,
-                }
-                for r in results
-            ]
+            'data': data
         })
     
     elif group_by == 'category':
-        results = db.session.query(
+        query = db.session.query(
             Category.name,
             func.sum(AmazonOrderItem.total_price).label('total'),
             func.count(AmazonOrderItem.id).label('item_count')
         ).join(
             AmazonOrderItem, Category.id == AmazonOrderItem.category_id
-        ).group_by(
+        )
+        if filters:
+            query = query.join(AmazonOrder, AmazonOrder.id == AmazonOrderItem.amazon_order_id).filter(*filters)
+        
+        results = query.group_by(
             Category.name
         ).order_by(
             func.sum(AmazonOrderItem.total_price).desc()
@@ -186,7 +236,7 @@ def spending_stats():
             extract('year', AmazonOrder.order_date).label('year'),
             func.sum(AmazonOrder.total_amount).label('total'),
             func.count(AmazonOrder.id).label('order_count')
-        ).group_by('year').order_by('year').all()
+        ).filter(*filters).group_by('year').order_by('year').all()
         
         return jsonify({
             'group_by': 'year',
@@ -205,17 +255,34 @@ def spending_stats():
 
 @amazon_bp.route('/stats/uncategorized', methods=['GET'])
 def uncategorized_items():
-    """Get list of items that haven't been categorized."""
-    items = AmazonOrderItem.query.filter(
+    """
+    Get list of items that haven't been categorized.
+    
+    Query params:
+        - limit: Max results (default 100, at most MAX_LIMIT)
+    """
+    limit = int(request.args.get('limit', 100))
+    if limit > MAX_LIMIT:
+        return jsonify({'error': f'limit must not exceed {MAX_LIMIT}'}), 400
+    
+    # COUNT(*) OVER () returns the full uncategorized total alongside the page
+    rows = db.session.query(
+        AmazonOrderItem,
+        func.count().over().label('total')
+    ).options(
+        joinedload(AmazonOrderItem.order)
+    ).filter(
         AmazonOrderItem.category_id.is_(None)
     ).order_by(
         AmazonOrderItem.total_price.desc()
-    ).limit(100).all()
+    ).limit(limit).yield_per(YIELD_PER)
     
-    return jsonify({
-        'count': AmazonOrderItem.query.filter(AmazonOrderItem.category_id.is_(None)).count(),
-        'items': [
-            {
+    total = 0
+    
+    def serialize():
+        nonlocal total
+        for item, total in rows:
+            yield {
                 'id': item.id,
                 'name': item.item_name,
                 'asin': item.asin,
@@ -223,9 +290,8 @@ def uncategorized_items():
                 'order_number': item.order.order_number,
                 'order_date': item.order.order_date.isoformat(),
             }
-            for item in items
-        ]
-    })
+    
+    return stream_json_list('items', serialize(), lambda: {'count': total})
 
 
 @amazon_bp.route('/stats/top-products', methods=['GET'])
@@ -233,26 +299,29 @@ def top_products():
     """
     Get top products by spending.
     
+    Reads the amazon_product_stats summary, which is rebuilt after each
+    import and email sync rather than aggregating every item per request.
+    
     Query params:
         - category_id: Filter by category
         - limit: Max results (default 20)
     """
     query = db.session.query(
-        AmazonOrderItem.item_name,
-        AmazonOrderItem.asin,
-        func.sum(AmazonOrderItem.total_price).label('total_spent'),
-        func.sum(AmazonOrderItem.quantity).label('total_quantity'),
-        func.count(AmazonOrderItem.id).label('purchase_count')
+        AmazonProductStat.item_name,
+        AmazonProductStat.asin,
+        func.sum(AmazonProductStat.total_spent).label('total_spent'),
+        func.sum(AmazonProductStat.total_quantity).label('total_quantity'),
+        func.sum(AmazonProductStat.purchase_count).label('purchase_count')
     ).group_by(
-        AmazonOrderItem.item_name,
-        AmazonOrderItem.asin
+        AmazonProductStat.item_name,
+        AmazonProductStat.asin
     )
     
     if category_id := request.args.get('category_id'):
-        query = query.filter(AmazonOrderItem.category_id == int(category_id))
+        query = query.filter(AmazonProductStat.category_id == int(category_id))
     
     limit = int(request.args.get('limit', 20))
-    results = query.order_by(func.sum(AmazonOrderItem.total_price).desc()).limit(limit).all()
+    results = query.order_by(func.sum(AmazonProductStat.total_spent).desc()).limit(limit).all()
     
     return jsonify({
         'products': [
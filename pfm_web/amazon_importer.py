@@ -2,15 +2,154 @@
 from __future__ import annotations
 
 import csv
-import json
-from collections import defaultdict
-from dataclasses import dataclass
-from datetime import datetime
+import io
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import groupby
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional
 
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    delete,
+    exists,
+    func,
+    insert,
+    select,
+    update,
+)
+
+from .analytics import clear_analytics_cache
 from .extensions import db
-from .models import AmazonOrder, AmazonOrderItem, Category
+from .json_provider import dump_json, load_json
+from .models import AmazonOrder, AmazonOrderItem, AmazonProductStat, Category
+
+try:  # Optional accelerator for keyword categorization
+    import ahocorasick
+except ImportError:  # pragma: no cover - falls back to compiled regexes
+    ahocorasick = None
+
+try:  # Optional multi-threaded CSV parser for large exports
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except ImportError:  # pragma: no cover - falls back to csv.DictReader
+    pa = pacsv = None
+
+logger = logging.getLogger(__name__)
+
+# Number of orders written per commit during CSV import
+BATCH_SIZE = 500
+
+# Category keyword rules (expand as needed). Earlier categories win when a
+# product name matches keywords from several categories.
+CATEGORY_RULES: dict[str, list[str]] = {
+    'Food & Beverages': [
+        'coffee', 'tea', 'water', 'drink', 'beverage', 'snack', 'chip', 'cookie',
+        'candy', 'chocolate', 'food', 'vitamin', 'supplement', 'protein', 'fiber',
+        'honey', 'sauce', 'tuna', 'pasta', 'noodle', 'ramen', 'gum', 'lollipop',
+        'sparkling', 'juice', 'latte', 'probiotic', 'prebiotic', 'gummy', 'gummies',
+    ],
+    'Health & Personal Care': [
+        'toothpaste', 'toothbrush', 'dental', 'floss', 'mask', 'face', 'cream',
+        'lotion', 'soap', 'shampoo', 'conditioner', 'skincare', 'makeup', 'cosmetic',
+        'lip', 'balm', 'foundation', 'sunscreen', 'vitamin d', 'medicine', 'nyquil',
+        'cough', 'throat', 'immune', 'health', 'cold & flu', 'scalp', 'hair care',
+    ],
+    'Home & Kitchen': [
+        'kitchen', 'pan', 'cookware', 'cup', 'bottle', 'organizer', 'storage',
+        'cart', 'trash bag', 'hanger', 'foam roller', 'power strip', 'grinder',
+        'salt and pepper', 'dish soap', 'cleaning', 'cleanser', 'tofu press',
+        'hose', 'garden', 'wood repair', 'epoxy',
+    ],
+    'Electronics': [
+        'mouse', 'keyboard', 'laptop', 'usb', 'cable', 'charger', 'flash drive',
+        'memory stick', 'fan', 'portable fan', 'led', 'light bulb', 'refrigerator light',
+    ],
+    'Office Supplies': [
+        'pencil', 'pen', 'eraser', 'marker', 'sharpie', 'pouch', 'folder',
+        'notebook', 'paper', 'stamp', 'sticker', 'school supplies',
+    ],
+    'Clothing & Accessories': [
+        'underwear', 'bikini', 'hat', 'cap', 'visor', 'backpack', 'luggage',
+        'suitcase', 'jewelry box',
+    ],
+    'Toys & Games': [
+        'toy', 'camera', 'kids', 'plush', 'stuffed animal', 'slime', 'sticker',
+    ],
+    'Books': [
+        'book', 'frindle', 'novel', 'reading',
+    ],
+}
+
+
+def _build_category_matcher() -> Callable[[str], Optional[str]]:
+    """
+    Compile CATEGORY_RULES into a single-pass keyword matcher.
+    
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, otherwise
+    one compiled alternation per category.
+    
+    Returns:
+        Function mapping a lowercased product name to a category name or None
+    """
+    category_names = list(CATEGORY_RULES)
+    
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for priority, category_name in enumerate(category_names):
+            for keyword in CATEGORY_RULES[category_name]:
+                if not automaton.exists(keyword):
+                    automaton.add_word(keyword, priority)
+        automaton.make_automaton()
+        
+        def match(text: str) -> Optional[str]:
+            priority = min((value for _, value in automaton.iter(text)), default=None)
+            return category_names[priority] if priority is not None else None
+        
+        return match
+    
+    patterns = [
+        (category_name, re.compile('|'.join(map(re.escape, keywords))))
+        for category_name, keywords in CATEGORY_RULES.items()
+    ]
+    
+    def match(text: str) -> Optional[str]:
+        for category_name, pattern in patterns:
+            if pattern.search(text):
+                return category_name
+        return None
+    
+    return match
+
+
+# Product names repeat heavily across order histories; memoize the match
+_match_category = lru_cache(maxsize=50_000)(_build_category_matcher())
+
+
+# Per-connection staging table used to dedupe each import batch in SQL
+_STAGED_ORDERS = Table(
+    'staged_amazon_orders',
+    MetaData(),
+    Column('order_number', String(100), primary_key=True),
+    Column('order_date', DateTime, nullable=False),
+    Column('total_amount', Float, nullable=False),
+    Column('currency', String(10), nullable=False),
+    Column('payment_method', String(50)),
+    Column('shipment_status', String(50)),
+    Column('raw_payload', Text),
+    Column('item_count', Integer, nullable=False),
+    prefixes=['TEMPORARY'],
+)
 
 
 @dataclass
@@ -20,6 +159,21 @@ class AmazonImportResult:
     orders_skipped: int = 0
     items_created: int = 0
     items_categorized: int = 0
+    parse_errors: int = 0
+
+
+@dataclass
+class _OrderBatch:
+    """Order data staged for a single bulk insert, keyed by order number."""
+    orders: dict[str, dict] = field(default_factory=dict)  # new orders
+    appended: dict[str, dict] = field(default_factory=dict)  # rows for orders written earlier
+    # Every order flushed so far in this import -> its id, or None if it was
+    # already stored before the import. Kept across batches.
+    written: dict[str, Optional[int]] = field(default_factory=dict)
+    
+    def clear(self) -> None:
+        self.orders.clear()
+        self.appended.clear()
 
 
 def import_amazon_csv(csv_path: Path) -> AmazonImportResult:
@@ -27,7 +181,8 @@ def import_amazon_csv(csv_path: Path) -> AmazonImportResult:
     Import Amazon order history CSV file.
     
     The CSV has one row per item, but multiple items can belong to the same order.
-    We group by Order ID to create order-level records.
+    Orders are streamed from the file one at a time and committed in batches of
+    ``BATCH_SIZE`` so memory stays bounded for large order histories.
     
     Args:
         csv_path: Path to the Amazon Retail.OrderHistory.csv file
@@ -36,44 +191,179 @@ def import_amazon_csv(csv_path: Path) -> AmazonImportResult:
         AmazonImportResult with counts of created/skipped orders
     """
     result = AmazonImportResult()
+    category_ids = dict(db.session.query(Category.name, Category.id).all())
     
-    # Group items by Order ID
-    orders_dict = _parse_csv_to_orders(csv_path)
+    batch = _OrderBatch()
+    for order_id, order_data in _iter_orders(csv_path, result):
+        _stage_amazon_order(order_id, order_data, batch)
+        
+        if len(batch.orders) + len(batch.appended) >= BATCH_SIZE:
+            _write_batch(batch, result, category_ids)
     
-    # Process each order
-    for order_id, order_data in orders_dict.items():
-        created = _upsert_amazon_order(order_id, order_data, result)
-        if created:
-            result.orders_created += 1
-        else:
-            result.orders_skipped += 1
+    _write_batch(batch, result, category_ids)
     
-    db.session.commit()
+    if result.parse_errors:
+        logger.warning('Amazon import of %s finished with %d parse errors', csv_path, result.parse_errors)
+    if result.orders_created:
+        refresh_product_stats()
+        # Orders were written through Core, which skips the ORM cache hooks
+        clear_analytics_cache()
     return result
 
 
-def _parse_csv_to_orders(csv_path: Path) -> dict[str, dict]:
+def refresh_product_stats() -> None:
     """
-    Parse CSV and group items by Order ID.
+    Rebuild the amazon_product_stats summary from amazon_order_items.
     
-    Returns:
-        Dict mapping Order ID -> {order_fields, items: [item_dicts]}
+    Runs as one delete + INSERT ... SELECT in a single transaction, so readers
+    keep seeing the previous totals until the commit.
+    """
+    aggregate = select(
+        AmazonOrderItem.item_name,
+        AmazonOrderItem.asin,
+        AmazonOrderItem.category_id,
+        func.sum(AmazonOrderItem.total_price),
+        func.sum(AmazonOrderItem.quantity),
+        func.count(AmazonOrderItem.id),
+    ).group_by(
+        AmazonOrderItem.item_name,
+        AmazonOrderItem.asin,
+        AmazonOrderItem.category_id,
+    )
+    
+    db.session.execute(delete(AmazonProductStat))
+    db.session.execute(
+        insert(AmazonProductStat.__table__).from_select(
+            ['item_name', 'asin', 'category_id', 'total_spent', 'total_quantity', 'purchase_count'],
+            aggregate,
+        )
+    )
+    db.session.commit()
+
+
+def _write_batch(
+    batch: _OrderBatch,
+    result: AmazonImportResult,
+    category_ids: dict[str, int],
+) -> None:
     """
-    orders: dict[str, dict] = defaultdict(lambda: {"items": []})
+    Insert staged orders that are not stored yet, then their items, and commit.
     
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+    The batch is copied into a temporary staging table and moved into
+    amazon_orders with one INSERT ... SELECT ... WHERE NOT EXISTS, so
+    deduplication against existing orders happens in the database. Its
+    RETURNING clause supplies the new ids for the item foreign keys. Rows
+    of orders written by an earlier batch are added to those orders, whose
+    total, item count and raw payload are updated to match.
+    """
+    item_rows = []
+    
+    if batch.orders:
+        _STAGED_ORDERS.create(db.session.connection(), checkfirst=True)
+        db.session.execute(insert(_STAGED_ORDERS), [
+            _build_order_row(order_number, order_data, result)
+            for order_number, order_data in batch.orders.items()
+        ])
         
-        for row in reader:
-            order_id = row['Order ID']
-            
+        staged = _STAGED_ORDERS.c
+        new_orders = select(*staged).where(
+            ~exists().where(AmazonOrder.order_number == staged.order_number)
+        )
+        order_ids = dict(db.session.execute(
+            insert(AmazonOrder.__table__)
+            .from_select([column.name for column in staged], new_orders)
+            .returning(AmazonOrder.order_number, AmazonOrder.id)
+        ).all())
+        db.session.execute(delete(_STAGED_ORDERS))
+        
+        result.orders_created += len(order_ids)
+        result.orders_skipped += len(batch.orders) - len(order_ids)
+        
+        # Only orders inserted above get items (and auto-categorization)
+        for order_number, order_data in batch.orders.items():
+            order_id = order_ids.get(order_number)
+            batch.written[order_number] = order_id
+            if order_id is not None:
+                item_rows.extend(_build_item_rows(order_id, order_data['items'], category_ids, result))
+    
+    # Later rows of orders inserted by an earlier batch of this import
+    for order_number, order_data in batch.appended.items():
+        order_id = batch.written[order_number]
+        item_rows.extend(_build_item_rows(order_id, order_data['items'], category_ids, result))
+        
+        raw_payload = db.session.execute(
+            select(AmazonOrder.raw_payload).where(AmazonOrder.id == order_id)
+        ).scalar_one()
+        stored_data = load_json(raw_payload)
+        stored_data['items'].extend(order_data['items'])
+        db.session.execute(
+            update(AmazonOrder.__table__)
+            .where(AmazonOrder.id == order_id)
+            .values(
+                total_amount=sum(item['total_price'] for item in stored_data['items']),
+                item_count=len(stored_data['items']),
+                raw_payload=dump_json(stored_data),
+            )
+        )
+    
+    result.items_created += len(item_rows)
+    if item_rows:
+        _insert_items(item_rows)
+    
+    db.session.commit()
+    batch.clear()
+
+
+# (table column, staged row key) pairs streamed by COPY on PostgreSQL
+_ITEM_COPY_COLUMNS = (
+    ('amazon_order_id', 'amazon_order_id'),
+    ('item_name', 'item_name'),
+    ('asin', 'asin'),
+    ('quantity', 'quantity'),
+    ('unit_price', 'unit_price'),
+    ('total_price', 'total_price'),
+    ('category_id', 'category_id'),
+    ('metadata', 'metadata_json'),
+)
+
+
+def _insert_items(item_rows: list[dict]) -> None:
+    """Insert staged item rows with COPY on PostgreSQL, executemany elsewhere."""
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg':
+        columns = ', '.join(column for column, _ in _ITEM_COPY_COLUMNS)
+        driver_connection = connection.connection.driver_connection
+        with driver_connection.cursor() as cursor:
+            with cursor.copy(f'COPY amazon_order_items ({columns}) FROM STDIN') as copy:
+                for row in item_rows:
+                    copy.write_row([row[key] for _, key in _ITEM_COPY_COLUMNS])
+        return
+    
+    db.session.execute(insert(AmazonOrderItem), item_rows)
+
+
+def _iter_orders(csv_path: Path, result: AmazonImportResult) -> Iterator[tuple[str, dict]]:
+    """
+    Stream orders from the CSV, grouping consecutive rows by Order ID.
+    
+    Amazon exports usually list all rows of an order together, so only one
+    order's rows are held in memory at a time. An order whose rows are split
+    up is yielded once per run; ``_stage_amazon_order`` merges the repeats.
+    
+    Yields:
+        (Order ID, {order_fields, items: [item_dicts]}) tuples
+    """
+    for order_id, rows in groupby(_iter_csv_rows(csv_path), key=lambda row: row['Order ID']):
+        order_data: dict = {"items": []}
+        
+        for row in rows:
             # Skip cancelled orders with no items
             if row['Order Status'] == 'Cancelled' and row['Quantity'] == '0':
                 continue
             
-            # First time seeing this order - capture order-level data
-            if not orders[order_id].get('order_date'):
-                orders[order_id].update({
+            # First row for this order - capture order-level data
+            if not order_data.get('order_date'):
+                order_data.update({
                     'order_date': row['Order Date'],
                     'currency': row['Currency'],
                     'payment_method': row['Payment Instrument Type'],
@@ -85,14 +375,69 @@ def _parse_csv_to_orders(csv_path: Path) -> dict[str, dict]:
                 })
             
             # Add item to this order
-            item = _parse_item_from_row(row)
+            item = _parse_item_from_row(row, result)
             if item:
-                orders[order_id]['items'].append(item)
+                order_data['items'].append(item)
+        
+        # Every row of the order was a cancelled placeholder
+        if not order_data.get('order_date'):
+            continue
+        
+        yield order_id, order_data
+
+
+def _iter_csv_rows(csv_path: Path) -> Iterator[dict]:
+    """
+    Yield CSV rows as dicts of strings.
+    
+    Uses pyarrow's streaming reader when installed, which parses blocks in C
+    across threads; otherwise falls back to ``csv.DictReader``. Both paths
+    accept quoted multi-line values and pad short rows with None.
+    """
+    if pacsv is None:
+        with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+            yield from csv.DictReader(f)
+        return
+    
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        header = next(csv.reader(f), None)
+    if not header:
+        return
+    
+    # pyarrow rejects rows with the wrong number of fields; parse those like
+    # csv.DictReader does and yield them after the block they came from
+    ragged: list[dict] = []
+    
+    def keep_ragged_row(row) -> str:
+        values = next(csv.reader(io.StringIO(row.text)), [])
+        record = dict(zip(header, values))
+        if len(values) > len(header):
+            record[None] = values[len(header):]
+        else:
+            record.update(dict.fromkeys(header[len(values):]))
+        ragged.append(record)
+        return 'skip'
     
-    return dict(orders)
+    # Keep every column as text so rows match what csv.DictReader produces;
+    # pyarrow reads UTF-8 and skips a BOM, like the utf-8-sig fallback
+    reader = pacsv.open_csv(
+        csv_path,
+        read_options=pacsv.ReadOptions(block_size=16 << 20),
+        parse_options=pacsv.ParseOptions(
+            newlines_in_values=True, invalid_row_handler=keep_ragged_row,
+        ),
+        convert_options=pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in header}
+        ),
+    )
+    for record_batch in reader:
+        yield from record_batch.to_pylist()
+        yield from ragged
+        ragged.clear()
+    yield from ragged
 
 
-def _parse_item_from_row(row: dict) -> Optional[dict]:
+def _parse_item_from_row(row: dict, result: AmazonImportResult) -> Optional[dict]:
     """Extract item data from a CSV row."""
     try:
         # Skip rows where product name is empty or quantity is 0
@@ -119,139 +464,146 @@ def _parse_item_from_row(row: dict) -> Optional[dict]:
             'website': row.get('Website', 'Amazon.com'),
         }
     except (ValueError, KeyError, TypeError) as e:
-        print(f"Warning: Could not parse item from row: {e} - Product: {row.get('Product Name', 'Unknown')[:50]}")
+        result.parse_errors += 1
+        if logger.isEnabledFor(logging.WARNING):
+            logger.warning(
+                'Could not parse item from row: %s - Product: %s',
+                e, (row.get('Product Name') or 'Unknown')[:50],
+            )
         return None
 
 
-def _upsert_amazon_order(order_id: str, order_data: dict, result: AmazonImportResult) -> bool:
+def _stage_amazon_order(order_id: str, order_data: dict, batch: _OrderBatch) -> None:
     """
-    Create or update an Amazon order in the database.
+    Stage an Amazon order and its items for bulk insert.
     
-    Returns:
-        True if created, False if already existed
-    """
-    # Check if order already exists
-    existing = AmazonOrder.query.filter_by(order_number=order_id).first()
-    if existing:
-        return False
+    Rows of an order seen earlier in the file are merged into it: into the
+    staged order while it is still in this batch, otherwise into the order
+    written by an earlier batch. Orders already stored before the import are
+    filtered out later by ``_write_batch``.
     
+    Args:
+        batch: Pending orders written by ``_write_batch``
+    """
+    if order_id in batch.orders:
+        batch.orders[order_id]['items'].extend(order_data['items'])
+    elif order_id not in batch.written:
+        batch.orders[order_id] = order_data
+    elif batch.written[order_id] is None:
+        return  # Stored before this import; already counted as skipped
+    elif order_id in batch.appended:
+        batch.appended[order_id]['items'].extend(order_data['items'])
+    else:
+        batch.appended[order_id] = order_data
+
+
+def _build_order_row(order_id: str, order_data: dict, result: AmazonImportResult) -> dict:
+    """Build a staged amazon_orders row from merged order data."""
     # Parse order date
-    order_date = _parse_amazon_datetime(order_data['order_date'])
+    order_date = _parse_amazon_datetime(order_data['order_date'], result)
     
     # Calculate total from items (more accurate than Total Owed which may be aggregate)
     total_amount = sum(item['total_price'] for item in order_data['items'])
     
-    # Create order
-    order = AmazonOrder(
-        order_number=order_id,
-        order_date=order_date,
-        total_amount=total_amount,
-        currency=order_data['currency'],
-        payment_method=order_data.get('payment_method'),
-        shipment_status=order_data.get('shipment_status'),
-        raw_payload=json.dumps(order_data, ensure_ascii=False),
-    )
-    
-    # Add items with auto-categorization
-    for item_data in order_data['items']:
-        order_item = _create_order_item(item_data)
-        order.items.append(order_item)
-        result.items_created += 1
+    return {
+        'order_number': order_id,
+        'order_date': order_date,
+        'total_amount': total_amount,
+        'currency': order_data['currency'],
+        'payment_method': order_data.get('payment_method'),
+        'shipment_status': order_data.get('shipment_status'),
+        'raw_payload': dump_json(order_data),
+        'item_count': len(order_data['items']),
+    }
+
+
+def _build_item_rows(
+    order_id: int,
+    items: list[dict],
+    category_ids: dict[str, int],
+    result: AmazonImportResult,
+) -> list[dict]:
+    """Build item insert mappings for one order, counting categorized items."""
+    item_rows = []
+    for item_data in items:
+        item_row = _build_order_item_row(item_data, category_ids)
+        item_row['amazon_order_id'] = order_id
+        item_rows.append(item_row)
         
-        if order_item.category_id:
+        if item_row['category_id']:
             result.items_categorized += 1
-    
-    db.session.add(order)
-    return True
+    return item_rows
 
 
-def _create_order_item(item_data: dict) -> AmazonOrderItem:
-    """Create an AmazonOrderItem with auto-categorization."""
-    category = _auto_categorize_product(item_data['product_name'], item_data.get('asin'))
+def _build_order_item_row(item_data: dict, category_ids: dict[str, int]) -> dict:
+    """Build an AmazonOrderItem insert mapping with auto-categorization."""
+    category_id = _auto_categorize_product(
+        item_data['product_name'], item_data.get('asin'), category_ids
+    )
     
-    return AmazonOrderItem(
-        item_name=item_data['product_name'],
-        asin=item_data.get('asin'),
-        quantity=item_data['quantity'],
-        unit_price=item_data['unit_price'],
-        total_price=item_data['total_price'],
-        category_id=category.id if category else None,
-        metadata_json=json.dumps({
+    return {
+        'item_name': item_data['product_name'],
+        'asin': item_data.get('asin'),
+        'quantity': item_data['quantity'],
+        'unit_price': item_data['unit_price'],
+        'total_price': item_data['total_price'],
+        'category_id': category_id,
+        'metadata_json': dump_json({
             'unit_price_tax': item_data.get('unit_price_tax'),
             'product_condition': item_data.get('product_condition'),
             'website': item_data.get('website'),
-        }, ensure_ascii=False),
-    )
+        }),
+    }
 
 
-def _auto_categorize_product(product_name: str, asin: Optional[str] = None) -> Optional[Category]:
+def _auto_categorize_product(
+    product_name: str,
+    asin: Optional[str] = None,
+    category_ids: Optional[dict[str, int]] = None,
+) -> Optional[int]:
     """
     Automatically categorize a product based on name and ASIN.
     
-    Uses keyword matching to assign products to categories.
-    Returns None if no good match is found.
+    Uses keyword matching to assign products to categories. Category ids are
+    looked up in (and added to) ``category_ids`` so each category is queried
+    at most once per import.
+    
+    Returns:
+        Category id, or None if no good match is found
     """
-    product_lower = product_name.lower()
-    
-    # Category keyword rules (expand as needed)
-    category_rules = {
-        'Food & Beverages': [
-            'coffee', 'tea', 'water', 'drink', 'beverage', 'snack', 'chip', 'cookie',
-            'candy', 'chocolate', 'food', 'vitamin', 'supplement', 'protein', 'fiber',
-            'honey', 'sauce', 'tuna', 'pasta', 'noodle', 'ramen', 'gum', 'lollipop',
-            'sparkling', 'juice', 'latte', 'probiotic', 'prebiotic', 'gummy', 'gummies',
-        ],
-        'Health & Personal Care': [
-            'toothpaste', 'toothbrush', 'dental', 'floss', 'mask', 'face', 'cream',
-            'lotion', 'soap', 'shampoo', 'conditioner', 'skincare', 'makeup', 'cosmetic',
-            'lip', 'balm', 'foundation', 'sunscreen', 'vitamin d', 'medicine', 'nyquil',
-            'cough', 'throat', 'immune', 'health', 'cold & flu', 'scalp', 'hair care',
-        ],
-        'Home & Kitchen': [
-            'kitchen', 'pan', 'cookware', 'cup', 'bottle', 'organizer', 'storage',
-            'cart', 'trash bag', 'hanger', 'foam roller', 'power strip', 'grinder',
-            'salt and pepper', 'dish soap', 'cleaning', 'cleanser', 'tofu press',
-            'hose', 'garden', 'wood repair', 'epoxy',
-        ],
-        'Electronics': [
-            'mouse', 'keyboard', 'laptop', 'usb', 'cable', 'charger', 'flash drive',
-            'memory stick', 'fan', 'portable fan', 'led', 'light bulb', 'refrigerator light',
-        ],
-        'Office Supplies': [
-            'pencil', 'pen', 'eraser', 'marker', 'sharpie', 'pouch', 'folder',
-            'notebook', 'paper', 'stamp', 'sticker', 'school supplies',
-        ],
-        'Clothing & Accessories': [
-            'underwear', 'bikini', 'hat', 'cap', 'visor', 'backpack', 'luggage',
-            'suitcase', 'jewelry box',
-        ],
-        'Toys & Games': [
-            'toy', 'camera', 'kids', 'plush', 'stuffed animal', 'slime', 'sticker',
-        ],
-        'Books': [
-            'book', 'frindle', 'novel', 'reading',
-        ],
-    }
+    category_name = _match_category(product_name.lower())
+    if category_name is None:
+        return None
+    
+    if category_ids is None:
+        category_ids = {}
+    if category_name in category_ids:
+        return category_ids[category_name]
     
-    # Find matching category
-    for category_name, keywords in category_rules.items():
-        if any(keyword in product_lower for keyword in keywords):
-            category = Category.query.filter_by(name=category_name).first()
-            if category:
-                return category
-            # Create category if it doesn't exist
-            category = Category(name=category_name, type='expense')
-            db.session.add(category)
-            db.session.flush()  # Get ID without committing
-            return category
+    category = Category.query.filter_by(name=category_name).first()
+    if not category:
+        # Create category if it doesn't exist
+        category = Category(name=category_name, type='expense')
+        db.session.add(category)
+        db.session.flush()  # Get ID without committing
     
-    return None
+    category_ids[category_name] = category.id
+    return category.id
 
 
-def _parse_amazon_datetime(date_str: str) -> datetime:
+def _parse_amazon_datetime(date_str: str, result: Optional[AmazonImportResult] = None) -> datetime:
     """Parse Amazon's ISO 8601 datetime format."""
     try:
-        # Amazon uses: 2025-11-19T16:27:13Z
+        # Amazon uses: 2025-11-19T16:27:13Z (optionally with milliseconds).
+        # fromisoformat is implemented in C and much cheaper than strptime.
+        parsed = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed.replace(microsecond=0)
+    except ValueError:
+        pass
+    
+    try:
         return datetime.strptime(date_str, '%Y-%m-%dT%H:%M:%SZ')
     except ValueError:
         try:
@@ -259,5 +611,7 @@ def _parse_amazon_datetime(date_str: str) -> datetime:
             return datetime.strptime(date_str.split('.')[0], '%Y-%m-%dT%H:%M:%S')
         except ValueError:
             # Fallback to current time if parsing fails
-            print(f"Warning: Could not parse date '{date_str}', using current time")
+            if result is not None:
+                result.parse_errors += 1
+            logger.warning("Could not parse date '%s', using current time", date_str)
             return datetime.utcnow()
@@ -3,12 +3,15 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import starmap
 from typing import Optional, Literal
 
-from sqlalchemy import func, extract, case, union_all
-from sqlalchemy.orm import aliased
+from flask import has_app_context
+from sqlalchemy import bindparam, event, func, extract, case, literal, select, union_all
+from sqlalchemy.orm import Session, aliased, object_session
 
-from .extensions import db
+from .extensions import cache, db
 from .models import (
     Receipt, ReceiptLineItem, AmazonOrder, AmazonOrderItem,
     Category, Shop
@@ -26,15 +29,187 @@ EXCHANGE_RATES_TO_USD = {
     'INR': 1.0 / 83.12,    # 1 INR = 0.012 USD
 }
 
-def get_currency_case_expression(model_class, amount_field):
-    """Create a CASE expression to convert amounts to USD."""
-    return case(
-        *[
-            (model_class.currency == curr, amount_field * rate)
-            for curr, rate in EXCHANGE_RATES_TO_USD.items()
-        ],
-        else_=amount_field  # Default to assuming USD if currency unknown
+
+def _to_usd(amount: Optional[float], currency: str) -> float:
+    """Convert an amount to USD, assuming USD for unknown currencies."""
+    return float(amount or 0) * EXCHANGE_RATES_TO_USD.get(currency, 1.0)
+
+
+def _period_bucket(column, granularity: str):
+    """
+    Bucket a datetime column for time series grouping.
+    
+    Day, month and year buckets are integers (YYYYMMDD, YYYYMM, YYYY); weeks
+    keep the ``%Y-W%W`` label. Use ``_format_period`` to render the label.
+    """
+    if granularity == 'week':
+        return func.strftime('%Y-W%W', column)
+    year = extract('year', column)
+    if granularity == 'day':
+        return (year * 100 + extract('month', column)) * 100 + extract('day', column)
+    if granularity == 'month':
+        return year * 100 + extract('month', column)
+    return year
+
+
+def _receipt_filters(
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    user_id: Optional[int],
+) -> list:
+    """
+    WHERE clauses shared by every receipt aggregate.
+    
+    Filter values are bound parameters, so SQLAlchemy caches one compiled
+    statement per combination of present filters and reuses it. Absent
+    filters are left out rather than written as ``:p IS NULL OR ...``, which
+    would stop the date indexes being used. ``bindparam()`` placeholders may
+    be passed in place of values.
+    """
+    clauses = [Receipt.status != 'cancelled']
+    if start_date is not None:
+        clauses.append(Receipt.issued_at >= start_date)
+    if end_date is not None:
+        clauses.append(Receipt.issued_at <= end_date)
+    if user_id is not None:
+        clauses.append(Receipt.user_id == user_id)
+    return clauses
+
+
+def _amazon_filters(start_date: Optional[datetime], end_date: Optional[datetime]) -> list:
+    """WHERE clauses shared by every Amazon order aggregate (see _receipt_filters)."""
+    clauses = []
+    if start_date is not None:
+        clauses.append(AmazonOrder.order_date >= start_date)
+    if end_date is not None:
+        clauses.append(AmazonOrder.order_date <= end_date)
+    return clauses
+
+
+def _format_period(bucket, granularity: str) -> str:
+    """Render a ``_period_bucket`` value as its period label."""
+    if granularity == 'week':
+        return bucket
+    bucket = int(bucket)
+    if granularity == 'day':
+        return f'{bucket // 10000:04d}-{bucket // 100 % 100:02d}-{bucket % 100:02d}'
+    if granularity == 'month':
+        return f'{bucket // 100:04d}-{bucket % 100:02d}'
+    return f'{bucket:04d}'
+
+
+GRANULARITIES = ('day', 'week', 'month', 'year')
+
+
+@lru_cache(maxsize=8)
+def _time_series_base(granularity: str, by_user: bool):
+    """
+    Unordered per-period receipt/Amazon totals for one granularity.
+    
+    Built once per (granularity, by_user) shape with ``start_date``,
+    ``end_date`` and ``user_id`` bind parameters, so requests only supply
+    values and the compiled statement cache always hits.
+    """
+    start_date, end_date = bindparam('start_date'), bindparam('end_date')
+    
+    # Integer buckets group and sort cheaper than per-row strings
+    receipt_period = _period_bucket(Receipt.issued_at, granularity)
+    amazon_period = _period_bucket(AmazonOrder.order_date, granularity)
+    
+    # Receipt time series
+    # Uses ix_receipts_user_issued_id_status / ix_receipts_issued_status
+    receipt_series = select(
+        receipt_period.label('period'),
+        literal('receipt').label('source'),
+        func.sum(Receipt.total_amount).label('total'),
+        func.count(Receipt.id).label('count')
+    ).where(
+        *_receipt_filters(start_date, end_date, bindparam('user_id') if by_user else None)
+    ).group_by('period')
+    
+    # Amazon time series
+    # Uses ix_amazon_orders_order_date
+    amazon_series = select(
+        amazon_period.label('period'),
+        literal('amazon').label('source'),
+        func.sum(AmazonOrder.total_amount).label('total'),
+        func.count(AmazonOrder.id).label('count')
+    ).where(
+        *_amazon_filters(start_date, end_date)
+    ).group_by('period')
+    
+    # Merge both series per period
+    combined = union_all(receipt_series, amazon_series).subquery()
+    return select(
+        combined.c.period,
+        # 0.0 keeps both sums floating point when a source has no rows
+        func.sum(case((combined.c.source == 'receipt', combined.c.total), else_=0.0)).label('receipt_total'),
+        func.sum(case((combined.c.source == 'amazon', combined.c.total), else_=0.0)).label('amazon_total'),
+        func.sum(combined.c.count).label('count')
+    ).group_by(combined.c.period)
+
+
+@lru_cache(maxsize=8)
+def _time_series_stmt(granularity: str, by_user: bool):
+    """``_time_series_base`` ordered by period, for get_time_series."""
+    base = _time_series_base(granularity, by_user)
+    return base.order_by(base.selected_columns.period).execution_options(yield_per=YIELD_PER)
+
+
+@lru_cache(maxsize=16)
+def _time_series_trend_stmt(granularity: str, by_user: bool, window: int):
+    """``_time_series_base`` plus a trailing ``window``-period spending sum."""
+    base = _time_series_base(granularity, by_user).subquery()
+    trailing_total = func.sum(base.c.receipt_total + base.c.amazon_total).over(
+        order_by=base.c.period, rows=(-(window - 1), 0)
     )
+    return select(base, trailing_total.label('trailing_total')).order_by(base.c.period)
+
+
+# Rows fetched per round trip when building unbounded result lists
+YIELD_PER = 500
+
+# Commits touching these models invalidate cached analytics responses
+_CACHED_MODELS = (Receipt, ReceiptLineItem, AmazonOrder, AmazonOrderItem)
+
+# Part of every cached analytics response key; bumping it orphans all of them
+RESPONSE_CACHE_VERSION_KEY = 'analytics:version'
+
+
+def clear_analytics_cache() -> None:
+    """Drop all cached analytics responses, e.g. after a bulk Core write."""
+    # The response cache may be shared (Redis), so invalidate it by version
+    if has_app_context():
+        cache.cache.inc(RESPONSE_CACHE_VERSION_KEY)
+
+
+def _mark_analytics_stale(mapper, connection, target) -> None:
+    """Flag the session so its next commit clears the analytics cache."""
+    session = object_session(target)
+    if session is not None:
+        session.info['analytics_stale'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _clear_stale_analytics(session) -> None:
+    # Cleared after commit so other requests cannot re-cache uncommitted state
+    if session.info.pop('analytics_stale', False):
+        clear_analytics_cache()
+
+
+for _model in _CACHED_MODELS:
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _mark_analytics_stale)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_bulk_write_stale(orm_execute_state) -> None:
+    # Bulk insert/update/delete statements bypass the mapper events above
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in _CACHED_MODELS:
+        orm_execute_state.session.info['analytics_stale'] = True
 
 
 @dataclass
@@ -44,12 +219,12 @@ class SpendingSummary:
     transaction_count: int
     item_count: int
     avg_transaction: float
-    date_range: tuple[datetime, datetime]
+    date_range: tuple[Optional[datetime], Optional[datetime]]
     by_source: dict[str, float]
     by_category: dict[str, float]
 
 
-@dataclass
+@dataclass(slots=True)
 class CategoryBreakdown:
     """Spending breakdown by category."""
     category_name: str
@@ -61,7 +236,7 @@ class CategoryBreakdown:
     avg_item_price: float
 
 
-@dataclass
+@dataclass(slots=True)
 class TimeSeriesPoint:
     """Single point in time series data."""
     period: str  # e.g., "2025-11" or "2025-11-20"
@@ -91,84 +266,109 @@ class UnifiedAnalytics:
         Returns:
             SpendingSummary with totals and breakdowns
         """
-        # Receipt totals (convert all to USD)
-        amount_in_usd = get_currency_case_expression(Receipt, Receipt.total_amount)
-        receipt_query = db.session.query(
-            func.sum(amount_in_usd).label('total'),
-            func.count(Receipt.id).label('count'),
-            func.coalesce(func.sum(
-                db.session.query(func.count(ReceiptLineItem.id))
-                .filter(ReceiptLineItem.receipt_id == Receipt.id)
-                .correlate(Receipt)
-                .scalar_subquery()
-            ), 0).label('items')
-        ).filter(Receipt.status != 'cancelled')
-        
-        if start_date:
-            receipt_query = receipt_query.filter(Receipt.issued_at >= start_date)
-        if end_date:
-            receipt_query = receipt_query.filter(Receipt.issued_at <= end_date)
-        if user_id:
-            receipt_query = receipt_query.filter(Receipt.user_id == user_id)
-        
-        receipt_stats = receipt_query.first()
-        
-        # Amazon order totals (convert all to USD)
-        amazon_amount_in_usd = get_currency_case_expression(AmazonOrder, AmazonOrder.total_amount)
-        amazon_query = db.session.query(
-            func.sum(amazon_amount_in_usd).label('total'),
-            func.count(AmazonOrder.id).label('count'),
-            func.coalesce(func.sum(
-                db.session.query(func.count(AmazonOrderItem.id))
-                .filter(AmazonOrderItem.amazon_order_id == AmazonOrder.id)
-                .correlate(AmazonOrder)
-                .scalar_subquery()
-            ), 0).label('items')
+        return UnifiedAnalytics._summary_from_totals(
+            UnifiedAnalytics._get_source_totals(start_date, end_date, user_id),
+            UnifiedAnalytics._get_category_totals(start_date, end_date, user_id),
         )
+    
+    @staticmethod
+    def _get_source_totals(
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        user_id: Optional[int] = None,
+    ) -> dict:
+        """Get USD totals, counts, item count and date range per source."""
+        # Item counts per parent, aggregated once instead of per-row subqueries.
+        # Filtered like the parents so only matching line items are scanned.
+        receipt_item_counts = select(
+            ReceiptLineItem.receipt_id,
+            func.count().label('n')
+        ).join(
+            Receipt, ReceiptLineItem.receipt_id == Receipt.id
+        ).where(
+            *_receipt_filters(start_date, end_date, user_id)
+        ).group_by(ReceiptLineItem.receipt_id).subquery()
         
-        if start_date:
-            amazon_query = amazon_query.filter(AmazonOrder.order_date >= start_date)
-        if end_date:
-            amazon_query = amazon_query.filter(AmazonOrder.order_date <= end_date)
-        
-        amazon_stats = amazon_query.first()
-        
-        # Combine totals
-        receipt_total = float(receipt_stats.total or 0)
-        amazon_total = float(amazon_stats.total or 0)
+        amazon_item_counts = select(
+            AmazonOrderItem.amazon_order_id,
+            func.count().label('n')
+        ).join(
+            AmazonOrder, AmazonOrderItem.amazon_order_id == AmazonOrder.id
+        ).where(
+            *_amazon_filters(start_date, end_date)
+        ).group_by(AmazonOrderItem.amazon_order_id).subquery()
+        
+        # Receipt totals per currency (converted to USD below)
+        # Uses ix_receipts_user_issued_id_status / ix_receipts_issued_status
+        receipt_query = select(
+            literal('receipts').label('source'),
+            Receipt.currency.label('currency'),
+            func.sum(Receipt.total_amount).label('total'),
+            func.count(Receipt.id).label('count'),
+            func.coalesce(func.sum(receipt_item_counts.c.n), 0).label('items'),
+            func.min(Receipt.issued_at).label('min_date'),
+            func.max(Receipt.issued_at).label('max_date')
+        ).outerjoin(
+            receipt_item_counts, receipt_item_counts.c.receipt_id == Receipt.id
+        ).where(
+            *_receipt_filters(start_date, end_date, user_id)
+        ).group_by(Receipt.currency)
+        
+        # Amazon order totals per currency (converted to USD below)
+        # Uses ix_amazon_orders_order_date
+        amazon_query = select(
+            literal('amazon').label('source'),
+            AmazonOrder.currency.label('currency'),
+            func.sum(AmazonOrder.total_amount).label('total'),
+            func.count(AmazonOrder.id).label('count'),
+            func.coalesce(func.sum(amazon_item_counts.c.n), 0).label('items'),
+            func.min(AmazonOrder.order_date).label('min_date'),
+            func.max(AmazonOrder.order_date).label('max_date')
+        ).outerjoin(
+            amazon_item_counts, amazon_item_counts.c.amazon_order_id == AmazonOrder.id
+        ).where(
+            *_amazon_filters(start_date, end_date)
+        ).group_by(AmazonOrder.currency)
+        
+        # One round trip: one aggregate row per source and currency
+        rows = db.session.execute(union_all(receipt_query, amazon_query)).all()
+        
+        totals = {'receipts': 0.0, 'amazon': 0.0}
+        counts = {'receipts': 0, 'amazon': 0}
+        item_count = 0
+        for row in rows:
+            totals[row.source] += _to_usd(row.total, row.currency)
+            counts[row.source] += row.count
+            item_count += row.items
+        
+        # Every grouped row has at least one transaction, so its dates are set
+        return {
+            'totals': totals,
+            'counts': counts,
+            'item_count': item_count,
+            'date_range': (
+                min((row.min_date for row in rows), default=None),
+                max((row.max_date for row in rows), default=None),
+            ),
+        }
+    
+    @staticmethod
+    def _summary_from_totals(source_totals: dict, by_category: dict[str, float]) -> SpendingSummary:
+        """Build a SpendingSummary from ``_get_source_totals`` output."""
+        receipt_total = source_totals['totals']['receipts']
+        amazon_total = source_totals['totals']['amazon']
         total_amount = receipt_total + amazon_total
         
-        receipt_count = receipt_stats.count or 0
-        amazon_count = amazon_stats.count or 0
-        transaction_count = receipt_count + amazon_count
-        
-        item_count = (receipt_stats.items or 0) + (amazon_stats.items or 0)
+        transaction_count = source_totals['counts']['receipts'] + source_totals['counts']['amazon']
         
         avg_transaction = total_amount / transaction_count if transaction_count > 0 else 0
         
-        # Get date range
-        receipt_dates = db.session.query(
-            func.min(Receipt.issued_at),
-            func.max(Receipt.issued_at)
-        ).first()
-        
-        amazon_dates = db.session.query(
-            func.min(AmazonOrder.order_date),
-            func.max(AmazonOrder.order_date)
-        ).first()
-        
-        min_date = min(d for d in [receipt_dates[0], amazon_dates[0]] if d)
-        max_date = max(d for d in [receipt_dates[1], amazon_dates[1]] if d)
-        
-        # Category breakdown
-        by_category = UnifiedAnalytics._get_category_totals(start_date, end_date, user_id)
-        
         return SpendingSummary(
             total_amount=total_amount,
             transaction_count=transaction_count,
-            item_count=item_count,
+            item_count=source_totals['item_count'],
             avg_transaction=avg_transaction,
-            date_range=(min_date, max_date),
+            date_range=source_totals['date_range'],
             by_source={
                 'receipts': receipt_total,
                 'amazon': amazon_total,
@@ -184,59 +384,47 @@ class UnifiedAnalytics:
     ) -> dict[str, float]:
         """Get spending totals by category."""
         # Receipt items by category
-        receipt_items_query = db.session.query(
-            Category.name,
+        # Uses ix_receipts_user_issued_id_status and ix_receipt_line_items_receipt_category_price
+        receipt_items_query = select(
+            Category.name.label('name'),
             func.sum(ReceiptLineItem.total_price).label('total')
         ).join(
             ReceiptLineItem, Category.id == ReceiptLineItem.category_id
         ).join(
             Receipt, ReceiptLineItem.receipt_id == Receipt.id
-        ).filter(
-            Receipt.status != 'cancelled'
-        )
-        
-        if start_date:
-            receipt_items_query = receipt_items_query.filter(Receipt.issued_at >= start_date)
-        if end_date:
-            receipt_items_query = receipt_items_query.filter(Receipt.issued_at <= end_date)
-        if user_id:
-            receipt_items_query = receipt_items_query.filter(Receipt.user_id == user_id)
-        
-        receipt_items_query = receipt_items_query.group_by(Category.name)
+        ).where(
+            *_receipt_filters(start_date, end_date, user_id)
+        ).group_by(Category.name)
         
         # Amazon items by category
-        amazon_items_query = db.session.query(
-            Category.name,
+        amazon_items_query = select(
+            Category.name.label('name'),
             func.sum(AmazonOrderItem.total_price).label('total')
         ).join(
             AmazonOrderItem, Category.id == AmazonOrderItem.category_id
         ).join(
             AmazonOrder, AmazonOrderItem.amazon_order_id == AmazonOrder.id
-        )
-        
-        if start_date:
-            amazon_items_query = amazon_items_query.filter(AmazonOrder.order_date >= start_date)
-        if end_date:
-            amazon_items_query = amazon_items_query.filter(AmazonOrder.order_date <= end_date)
-        
-        amazon_items_query = amazon_items_query.group_by(Category.name)
-        
-        # Combine results
-        by_category = {}
-        for name, total in receipt_items_query.all():
-            by_category[name] = float(total or 0)
-        
-        for name, total in amazon_items_query.all():
-            by_category[name] = by_category.get(name, 0) + float(total or 0)
-        
-        return by_category
+        ).where(
+            *_amazon_filters(start_date, end_date)
+        ).group_by(Category.name)
+        
+        # Merge both sources in the database
+        combined = union_all(receipt_items_query, amazon_items_query).subquery()
+        rows = db.session.execute(
+            select(
+                combined.c.name,
+                func.sum(combined.c.total)
+            ).group_by(combined.c.name)
+        ).all()
+        
+        return dict(rows)
     
     @staticmethod
     def get_category_breakdown(
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         user_id: Optional[int] = None,
-        limit: int = 20,
+        limit: Optional[int] = 20,
     ) -> list[CategoryBreakdown]:
         """
         Get detailed spending breakdown by category.
@@ -244,7 +432,8 @@ class UnifiedAnalytics:
         Returns list sorted by total spent descending.
         """
         # Receipt items
-        receipt_subquery = db.session.query(
+        # Uses ix_receipts_user_issued_id_status and ix_receipt_line_items_receipt_category_price
+        receipt_subquery = select(
             Category.id.label('category_id'),
             Category.name.label('category_name'),
             func.sum(ReceiptLineItem.total_price).label('total'),
@@ -254,21 +443,12 @@ class UnifiedAnalytics:
             ReceiptLineItem, Category.id == ReceiptLineItem.category_id
         ).join(
             Receipt, ReceiptLineItem.receipt_id == Receipt.id
-        ).filter(
-            Receipt.status != 'cancelled'
-        )
-        
-        if start_date:
-            receipt_subquery = receipt_subquery.filter(Receipt.issued_at >= start_date)
-        if end_date:
-            receipt_subquery = receipt_subquery.filter(Receipt.issued_at <= end_date)
-        if user_id:
-            receipt_subquery = receipt_subquery.filter(Receipt.user_id == user_id)
-        
-        receipt_subquery = receipt_subquery.group_by(Category.id, Category.name)
+        ).where(
+            *_receipt_filters(start_date, end_date, user_id)
+        ).group_by(Category.id, Category.name)
         
         # Amazon items
-        amazon_subquery = db.session.query(
+        amazon_subquery = select(
             Category.id.label('category_id'),
             Category.name.label('category_name'),
             func.sum(AmazonOrderItem.total_price).label('total'),
@@ -278,59 +458,33 @@ class UnifiedAnalytics:
             AmazonOrderItem, Category.id == AmazonOrderItem.category_id
         ).join(
             AmazonOrder, AmazonOrderItem.amazon_order_id == AmazonOrder.id
-        )
-        
-        if start_date:
-            amazon_subquery = amazon_subquery.filter(AmazonOrder.order_date >= start_date)
-        if end_date:
-            amazon_subquery = amazon_subquery.filter(AmazonOrder.order_date <= end_date)
-        
-        amazon_subquery = amazon_subquery.group_by(Category.id, Category.name)
-        
-        # Combine results manually (SQLite doesn't support FULL OUTER JOIN)
-        receipt_data = {row.category_id: row for row in receipt_subquery.all()}
-        amazon_data = {row.category_id: row for row in amazon_subquery.all()}
-        
-        # Merge data
-        all_category_ids = set(receipt_data.keys()) | set(amazon_data.keys())
-        combined = []
-        
-        for cat_id in all_category_ids:
-            receipt_row = receipt_data.get(cat_id)
-            amazon_row = amazon_data.get(cat_id)
-            
-            category_name = receipt_row.category_name if receipt_row else amazon_row.category_name
-            total_spent = (receipt_row.total if receipt_row else 0) + (amazon_row.total if amazon_row else 0)
-            item_count = (receipt_row.item_count if receipt_row else 0) + (amazon_row.item_count if amazon_row else 0)
-            transaction_count = (receipt_row.transaction_count if receipt_row else 0) + (amazon_row.transaction_count if amazon_row else 0)
-            
-            combined.append(type('obj', (object,), {
-                'category_id': cat_id,
-                'category_name': category_name,
-                'total_spent': total_spent,
-                'item_count': item_count,
-                'transaction_count': transaction_count,
-            })())
-        
-        # Sort by total spent descending
-        combined.sort(key=lambda x: x.total_spent, reverse=True)
-        combined = combined[:limit]
-        
-        # Calculate total for percentages
-        total_spent = sum(row.total_spent for row in combined)
-        
-        return [
-            CategoryBreakdown(
-                category_name=row.category_name,
-                category_id=row.category_id,
-                total_spent=float(row.total_spent),
-                item_count=row.item_count,
-                transaction_count=row.transaction_count,
-                percentage=(float(row.total_spent) / total_spent * 100) if total_spent > 0 else 0,
-                avg_item_price=float(row.total_spent) / row.item_count if row.item_count > 0 else 0,
-            )
-            for row in combined
-        ]
+        ).where(
+            *_amazon_filters(start_date, end_date)
+        ).group_by(Category.id, Category.name)
+        
+        # Combine both sources, then sort and limit in the database
+        combined = union_all(receipt_subquery, amazon_subquery).subquery()
+        total_column = func.sum(combined.c.total)
+        item_count_column = func.sum(combined.c.item_count)
+        # Columns follow CategoryBreakdown's field order so rows map straight onto it
+        stmt = select(
+            combined.c.category_name,
+            combined.c.category_id,
+            total_column.label('total_spent'),
+            item_count_column.label('item_count'),
+            func.sum(combined.c.transaction_count).label('transaction_count'),
+            # The window sum is evaluated before LIMIT, so percentages are against all categories
+            func.coalesce(
+                total_column * 100.0 / func.nullif(func.sum(total_column).over(), 0), 0.0
+            ).label('percentage'),
+            func.coalesce(total_column / func.nullif(item_count_column, 0), 0.0).label('avg_item_price')
+        ).group_by(
+            combined.c.category_id, combined.c.category_name
+        ).order_by(
+            total_column.desc()
+        ).limit(limit).execution_options(yield_per=YIELD_PER)
+        
+        return list(starmap(CategoryBreakdown, db.session.execute(stmt)))
     
     @staticmethod
     def get_time_series(
@@ -350,92 +504,80 @@ class UnifiedAnalytics:
             
         Returns:
             List of TimeSeriesPoint objects sorted by period
-        """
-        # Default to last 12 months if no dates provided
-        if not end_date:
-            end_date = datetime.now()
-        if not start_date:
-            start_date = end_date - timedelta(days=365)
         
-        # Build date format based on granularity
-        if granularity == 'day':
-            date_format = '%Y-%m-%d'
-            receipt_period = func.date(Receipt.issued_at)
-            amazon_period = func.date(AmazonOrder.order_date)
-        elif granularity == 'week':
-            date_format = '%Y-W%W'
-            receipt_period = func.strftime('%Y-W%W', Receipt.issued_at)
-            amazon_period = func.strftime('%Y-W%W', AmazonOrder.order_date)
-        elif granularity == 'month':
-            date_format = '%Y-%m'
-            receipt_period = func.strftime('%Y-%m', Receipt.issued_at)
-            amazon_period = func.strftime('%Y-%m', AmazonOrder.order_date)
-        else:  # year
-            date_format = '%Y'
-            receipt_period = func.strftime('%Y', Receipt.issued_at)
-            amazon_period = func.strftime('%Y', AmazonOrder.order_date)
-        
-        # Receipt time series
-        receipt_series = db.session.query(
-            receipt_period.label('period'),
-            func.sum(Receipt.total_amount).label('total'),
-            func.count(Receipt.id).label('count')
-        ).filter(
-            Receipt.status != 'cancelled',
-            Receipt.issued_at >= start_date,
-            Receipt.issued_at <= end_date
-        )
+        Raises:
+            ValueError: If granularity is not one of GRANULARITIES
+        """
+        stmt = _time_series_stmt(granularity, user_id is not None)
+        params = UnifiedAnalytics._time_series_params(start_date, end_date, granularity, user_id)
         
-        if user_id:
-            receipt_series = receipt_series.filter(Receipt.user_id == user_id)
+        return [
+            TimeSeriesPoint(
+                period=_format_period(row.period, granularity),
+                total_spent=row.receipt_total + row.amazon_total,
+                transaction_count=row.count,
+                receipt_total=row.receipt_total,
+                amazon_total=row.amazon_total,
+            )
+            for row in db.session.execute(stmt, params)
+        ]
+    
+    @staticmethod
+    def get_time_series_trend(
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        granularity: Literal['day', 'week', 'month', 'year'] = 'month',
+        user_id: Optional[int] = None,
+        window: int = 3,
+    ) -> tuple[list[TimeSeriesPoint], float, float]:
+        """
+        Get the time series plus its recent and previous average spend.
         
-        receipt_series = receipt_series.group_by('period').all()
+        The recent average covers the last ``window`` periods and the previous
+        one the ``window`` periods before those (both divided by ``window``).
+        They come from a windowed running sum in the same query, so no extra
+        pass over the series is needed. With fewer than ``2 * window`` periods
+        the previous average equals the recent one.
+        """
+        stmt = _time_series_trend_stmt(granularity, user_id is not None, window)
+        params = UnifiedAnalytics._time_series_params(start_date, end_date, granularity, user_id)
+        rows = db.session.execute(stmt, params).all()
         
-        # Amazon time series
-        amazon_series = db.session.query(
-            amazon_period.label('period'),
-            func.sum(AmazonOrder.total_amount).label('total'),
-            func.count(AmazonOrder.id).label('count')
-        ).filter(
-            AmazonOrder.order_date >= start_date,
-            AmazonOrder.order_date <= end_date
-        ).group_by('period').all()
-        
-        # Combine into dict
-        periods = {}
-        for row in receipt_series:
-            periods[row.period] = {
-                'receipt_total': float(row.total or 0),
-                'receipt_count': row.count,
-                'amazon_total': 0,
-                'amazon_count': 0,
-            }
-        
-        for row in amazon_series:
-            if row.period not in periods:
-                periods[row.period] = {
-                    'receipt_total': 0,
-                    'receipt_count': 0,
-                    'amazon_total': float(row.total or 0),
-                    'amazon_count': row.count,
-                }
-            else:
-                periods[row.period]['amazon_total'] = float(row.total or 0)
-                periods[row.period]['amazon_count'] = row.count
-        
-        # Convert to TimeSeriesPoint objects
-        result = [
+        series = [
             TimeSeriesPoint(
-                period=period,
-                total_spent=data['receipt_total'] + data['amazon_total'],
-                transaction_count=data['receipt_count'] + data['amazon_count'],
-                receipt_total=data['receipt_total'],
-                amazon_total=data['amazon_total'],
+                period=_format_period(row.period, granularity),
+                total_spent=row.receipt_total + row.amazon_total,
+                transaction_count=row.count,
+                receipt_total=row.receipt_total,
+                amazon_total=row.amazon_total,
             )
-            for period, data in sorted(periods.items())
+            for row in rows
         ]
+        recent_avg = rows[-1].trailing_total / window if rows else 0.0
+        previous_avg = rows[-window - 1].trailing_total / window if len(rows) >= 2 * window else recent_avg
+        return series, recent_avg, previous_avg
+    
+    @staticmethod
+    def _time_series_params(
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        granularity: str,
+        user_id: Optional[int],
+    ) -> dict:
+        """Bind parameters for the prebuilt time series statements."""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f'Unknown granularity: {granularity!r}')
+        
+        # Default to last 12 months if no dates provided
+        if not end_date:
+            end_date = datetime.now()
+        if not start_date:
+            start_date = end_date - timedelta(days=365)
         
-        return result
+        params = {'start_date': start_date, 'end_date': end_date}
+        if user_id is not None:
+            params['user_id'] = user_id
+        return params
     
     @staticmethod
     def get_top_merchants(
@@ -450,63 +592,42 @@ class UnifiedAnalytics:
         Combines shops from receipts with Amazon as a virtual shop.
         """
         # Shop spending from receipts
-        shop_query = db.session.query(
+        # Uses ix_receipts_user_issued_id_status / ix_receipts_issued_status
+        shop_query = select(
             Shop.name.label('merchant'),
+            literal('receipt').label('source'),
             func.sum(Receipt.total_amount).label('total'),
             func.count(Receipt.id).label('transaction_count')
         ).join(
             Receipt, Shop.id == Receipt.shop_id
-        ).filter(
-            Receipt.status != 'cancelled'
-        )
-        
-        if start_date:
-            shop_query = shop_query.filter(Receipt.issued_at >= start_date)
-        if end_date:
-            shop_query = shop_query.filter(Receipt.issued_at <= end_date)
-        if user_id:
-            shop_query = shop_query.filter(Receipt.user_id == user_id)
-        
-        shop_query = shop_query.group_by(Shop.name)
-        
-        # Amazon total
-        amazon_query = db.session.query(
+        ).where(
+            *_receipt_filters(start_date, end_date, user_id)
+        ).group_by(Shop.name)
+        
+        # Amazon as a single virtual merchant (omitted when there are no orders)
+        # Uses ix_amazon_orders_order_date
+        amazon_query = select(
+            literal('Amazon.com').label('merchant'),
+            literal('amazon').label('source'),
             func.sum(AmazonOrder.total_amount).label('total'),
             func.count(AmazonOrder.id).label('transaction_count')
-        )
-        
-        if start_date:
-            amazon_query = amazon_query.filter(AmazonOrder.order_date >= start_date)
-        if end_date:
-            amazon_query = amazon_query.filter(AmazonOrder.order_date <= end_date)
-        
-        amazon_stats = amazon_query.first()
-        
-        # Combine results
-        merchants = [
-            {
-                'merchant': row.merchant,
-                'total_spent': float(row.total),
-                'transaction_count': row.transaction_count,
-                'avg_transaction': float(row.total) / row.transaction_count,
-                'source': 'receipt',
-            }
-            for row in shop_query.all()
-        ]
-        
-        if amazon_stats.total:
-            merchants.append({
-                'merchant': 'Amazon.com',
-                'total_spent': float(amazon_stats.total),
-                'transaction_count': amazon_stats.transaction_count,
-                'avg_transaction': float(amazon_stats.total) / amazon_stats.transaction_count,
-                'source': 'amazon',
-            })
-        
-        # Sort by total spent
-        merchants.sort(key=lambda x: x['total_spent'], reverse=True)
-        
-        return merchants[:limit]
+        ).where(
+            *_amazon_filters(start_date, end_date)
+        ).having(func.count(AmazonOrder.id) > 0)
+        
+        # Rank both sources together in the database
+        combined = union_all(shop_query, amazon_query).subquery()
+        stmt = select(
+            combined.c.merchant,
+            combined.c.total.label('total_spent'),
+            combined.c.transaction_count,
+            func.coalesce(
+                combined.c.total / func.nullif(combined.c.transaction_count, 0), 0.0
+            ).label('avg_transaction'),
+            combined.c.source
+        ).order_by(combined.c.total.desc()).limit(limit)
+        
+        return [dict(row) for row in db.session.execute(stmt).mappings()]
     
     @staticmethod
     def compare_sources(
@@ -519,57 +640,101 @@ class UnifiedAnalytics:
         
         Returns metrics for each source side-by-side.
         """
-        # Receipt metrics (convert to USD)
-        amount_in_usd = get_currency_case_expression(Receipt, Receipt.total_amount)
-        receipt_query = db.session.query(
-            func.sum(amount_in_usd).label('total'),
-            func.count(Receipt.id).label('count'),
-            func.avg(amount_in_usd).label('avg')
-        ).filter(Receipt.status != 'cancelled')
-        
-        if start_date:
-            receipt_query = receipt_query.filter(Receipt.issued_at >= start_date)
-        if end_date:
-            receipt_query = receipt_query.filter(Receipt.issued_at <= end_date)
-        if user_id:
-            receipt_query = receipt_query.filter(Receipt.user_id == user_id)
-        
-        receipt_stats = receipt_query.first()
-        
-        # Amazon metrics (convert to USD)
-        amazon_amount_in_usd = get_currency_case_expression(AmazonOrder, AmazonOrder.total_amount)
-        amazon_query = db.session.query(
-            func.sum(amazon_amount_in_usd).label('total'),
-            func.count(AmazonOrder.id).label('count'),
-            func.avg(amazon_amount_in_usd).label('avg')
-        )
+        # Receipt metrics per currency (converted to USD below)
+        # Uses ix_receipts_user_issued_id_status / ix_receipts_issued_status
+        receipt_query = select(
+            Receipt.currency,
+            func.sum(Receipt.total_amount).label('total'),
+            func.count(Receipt.id).label('count')
+        ).where(
+            *_receipt_filters(start_date, end_date, user_id)
+        ).group_by(Receipt.currency)
         
-        if start_date:
-            amazon_query = amazon_query.filter(AmazonOrder.order_date >= start_date)
-        if end_date:
-            amazon_query = amazon_query.filter(AmazonOrder.order_date <= end_date)
+        receipt_rows = db.session.execute(receipt_query).all()
+        
+        # Amazon metrics per currency (converted to USD below)
+        # Uses ix_amazon_orders_order_date
+        amazon_query = select(
+            AmazonOrder.currency,
+            func.sum(AmazonOrder.total_amount).label('total'),
+            func.count(AmazonOrder.id).label('count')
+        ).where(
+            *_amazon_filters(start_date, end_date)
+        ).group_by(AmazonOrder.currency)
         
-        amazon_stats = amazon_query.first()
+        amazon_rows = db.session.execute(amazon_query).all()
         
-        receipt_total = float(receipt_stats.total or 0)
-        amazon_total = float(amazon_stats.total or 0)
+        return UnifiedAnalytics._comparison_from_totals(
+            sum(_to_usd(row.total, row.currency) for row in receipt_rows),
+            sum(row.count for row in receipt_rows),
+            sum(_to_usd(row.total, row.currency) for row in amazon_rows),
+            sum(row.count for row in amazon_rows),
+        )
+    
+    @staticmethod
+    def _comparison_from_totals(
+        receipt_total: float,
+        receipt_count: int,
+        amazon_total: float,
+        amazon_count: int,
+    ) -> dict:
+        """Build the compare_sources payload from per-source USD totals."""
         combined_total = receipt_total + amazon_total
         
         return {
             'receipts': {
                 'total': receipt_total,
-                'count': receipt_stats.count or 0,
-                'avg_transaction': float(receipt_stats.avg or 0),
+                'count': receipt_count,
+                'avg_transaction': receipt_total / receipt_count if receipt_count else 0,
                 'percentage': (receipt_total / combined_total * 100) if combined_total > 0 else 0,
             },
             'amazon': {
                 'total': amazon_total,
-                'count': amazon_stats.count or 0,
-                'avg_transaction': float(amazon_stats.avg or 0),
+                'count': amazon_count,
+                'avg_transaction': amazon_total / amazon_count if amazon_count else 0,
                 'percentage': (amazon_total / combined_total * 100) if combined_total > 0 else 0,
             },
             'combined': {
                 'total': combined_total,
-                'count': (receipt_stats.count or 0) + (amazon_stats.count or 0),
+                'count': receipt_count + amazon_count,
             },
         }
+    
+    @staticmethod
+    def get_dashboard(
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        user_id: Optional[int] = None,
+        granularity: Literal['day', 'week', 'month', 'year'] = 'month',
+        limit: int = 10,
+    ) -> dict:
+        """
+        Get every dashboard metric for one filter set in a single call.
+        
+        The per-source totals are queried once and shared by the summary and
+        the source comparison, and all statements run on the same session
+        connection instead of one request per widget.
+        
+        Returns:
+            Dict with summary, categories, time_series, merchants and comparison
+        """
+        source_totals = UnifiedAnalytics._get_source_totals(start_date, end_date, user_id)
+        # Unlimited breakdown doubles as the summary's per-category totals
+        categories = UnifiedAnalytics.get_category_breakdown(start_date, end_date, user_id, limit=None)
+        
+        by_category: dict[str, float] = {}
+        for cat in categories:
+            by_category[cat.category_name] = by_category.get(cat.category_name, 0) + cat.total_spent
+        
+        return {
+            'summary': UnifiedAnalytics._summary_from_totals(source_totals, by_category),
+            'categories': categories[:limit],
+            'time_series': UnifiedAnalytics.get_time_series(start_date, end_date, granularity, user_id),
+            'merchants': UnifiedAnalytics.get_top_merchants(start_date, end_date, user_id, limit),
+            'comparison': UnifiedAnalytics._comparison_from_totals(
+                source_totals['totals']['receipts'],
+                source_totals['counts']['receipts'],
+                source_totals['totals']['amazon'],
+                source_totals['counts']['amazon'],
+            ),
+        }
@@ -1,9 +1,12 @@
 """API endpoints for unified analytics."""
 from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+from urllib.parse import urlencode
+
 from flask import Blueprint, jsonify, request
 
-from .analytics import UnifiedAnalytics
-from .extensions import db
+from .analytics import GRANULARITIES, RESPONSE_CACHE_VERSION_KEY, UnifiedAnalytics
+from .extensions import cache, db
 
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
 
@@ -20,34 +23,100 @@ EXCHANGE_RATES = {
 }
 
 def convert_currency(amount, to_currency='USD'):
-    """Convert USD amount to target currency."""
-    if to_currency == 'USD' or to_currency not in EXCHANGE_RATES:
-        return amount
-    return amount * EXCHANGE_RATES[to_currency]
+    """Convert USD amount to target currency (unknown currencies stay USD)."""
+    return amount * EXCHANGE_RATES.get(to_currency, 1.0) if amount else amount
+
+# Response keys holding USD amounts; everything else is passed through as-is
+MONETARY_KEYS = frozenset({
+    'total_amount', 'total_spent', 'avg_transaction', 'avg_item_price',
+    'total', 'receipt_total', 'amazon_total',
+})
 
 def convert_dict_amounts(data, currency='USD'):
-    """Recursively convert monetary amounts in a dictionary."""
-    if currency == 'USD':
+    """
+    Convert monetary amounts in a response payload to the target currency.
+    
+    Walks nested dicts and lists with an explicit stack and converts them in
+    place, returning ``data``. Callers pass payloads built for the current
+    request and discard the original.
+    """
+    rate = EXCHANGE_RATES.get(currency, 1.0)
+    if rate == 1.0:
         return data
     
-    if isinstance(data, dict):
-        result = {}
-        for key, value in data.items():
-            if key in ('total_amount', 'total_spent', 'avg_transaction', 'avg_item_price', 
-                      'total', 'receipt_total', 'amazon_total'):
-                result[key] = convert_currency(value, currency) if value else value
-            elif isinstance(value, (dict, list)):
-                result[key] = convert_dict_amounts(value, currency)
-            else:
-                result[key] = value
-        return result
-    elif isinstance(data, list):
-        return [convert_dict_amounts(item, currency) for item in data]
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key in MONETARY_KEYS:
+                    if value:
+                        node[key] = value * rate
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+        elif isinstance(node, list):
+            stack.extend(value for value in node if isinstance(value, (dict, list)))
+    return data
+
+
+def _maybe_convert(response, currency):
+    """Skip the conversion call entirely for the default USD responses."""
+    return response if currency == 'USD' else convert_dict_amounts(response, currency)
+
+
+class RangeArgs(NamedTuple):
+    """Date range, user filter and currency shared by the analytics endpoints."""
+    start_date: datetime
+    end_date: datetime
+    user_id: Optional[int]
+    currency: str
+
+
+def parse_range_args(default_days=30) -> RangeArgs:
+    """
+    Parse the common analytics query params from the current request.
+    
+    ``start_date``/``end_date`` (YYYY-MM-DD) override the default window of
+    ``days`` (default ``default_days``) back from now.
+    """
+    args = request.args
+    now = datetime.now()
+    end_date = datetime.fromisoformat(args['end_date']) if args.get('end_date') else now
+    if args.get('start_date'):
+        start_date = datetime.fromisoformat(args['start_date'])
     else:
-        return data
+        start_date = now - timedelta(days=args.get('days', type=int, default=default_days))
+    return RangeArgs(
+        start_date,
+        end_date,
+        args.get('user_id', type=int),
+        args.get('currency', 'USD').upper(),
+    )
+
+
+def _response_cache_key(*args, **kwargs) -> str:
+    """Cache key for an analytics response: data version, path and sorted query."""
+    version = cache.get(RESPONSE_CACHE_VERSION_KEY) or 0
+    query = urlencode(sorted(request.args.items(multi=True)))
+    return f'analytics:{version}:{request.path}?{query}'
+
+
+@analytics_bp.after_request
+def _add_etag(response):
+    """
+    Tag successful responses with a content ETag and honour If-None-Match.
+    
+    Hashing the body (usually served from the response cache) stays correct
+    for any kind of data change, which a MAX(updated_at) probe would not.
+    """
+    if request.method == 'GET' and response.status_code == 200 and not response.is_streamed:
+        response.add_etag()
+        response.make_conditional(request)
+    return response
 
 
 @analytics_bp.route('/summary', methods=['GET'])
+@cache.cached(make_cache_key=_response_cache_key)
 def get_summary():
     """
     Get spending summary across all sources.
@@ -59,18 +128,7 @@ def get_summary():
         - currency: Target currency (default: USD)
         - user_id: User ID filter (optional)
     """
-    # Parse dates
-    end_date = datetime.now()
-    days = request.args.get('days', type=int, default=30)
-    start_date = end_date - timedelta(days=days)
-    
-    if start_str := request.args.get('start_date'):
-        start_date = datetime.fromisoformat(start_str)
-    if end_str := request.args.get('end_date'):
-        end_date = datetime.fromisoformat(end_str)
-    
-    user_id = request.args.get('user_id', type=int)
-    currency = request.args.get('currency', 'USD').upper()
+    start_date, end_date, user_id, currency = parse_range_args()
     
     summary = UnifiedAnalytics.get_spending_summary(start_date, end_date, user_id)
     
@@ -88,10 +146,11 @@ def get_summary():
         'currency': currency
     }
     
-    return jsonify(convert_dict_amounts(response, currency))
+    return jsonify(_maybe_convert(response, currency))
 
 
 @analytics_bp.route('/categories', methods=['GET'])
+@cache.cached(make_cache_key=_response_cache_key)
 def get_category_breakdown():
     """
     Get detailed category breakdown.
@@ -104,18 +163,8 @@ def get_category_breakdown():
         - user_id: User ID filter (optional)
         - limit: Max categories (default: 20)
     """
-    end_date = datetime.now()
-    days = request.args.get('days', type=int, default=30)
-    start_date = end_date - timedelta(days=days)
-    
-    if start_str := request.args.get('start_date'):
-        start_date = datetime.fromisoformat(start_str)
-    if end_str := request.args.get('end_date'):
-        end_date = datetime.fromisoformat(end_str)
-    
-    user_id = request.args.get('user_id', type=int)
+    start_date, end_date, user_id, currency = parse_range_args()
     limit = request.args.get('limit', type=int, default=20)
-    currency = request.args.get('currency', 'USD').upper()
     
     breakdown = UnifiedAnalytics.get_category_breakdown(
         start_date, end_date, user_id, limit
@@ -137,10 +186,11 @@ def get_category_breakdown():
         'currency': currency
     }
     
-    return jsonify(convert_dict_amounts(response, currency))
+    return jsonify(_maybe_convert(response, currency))
 
 
 @analytics_bp.route('/time-series', methods=['GET'])
+@cache.cached(make_cache_key=_response_cache_key)
 def get_time_series():
     """
     Get spending over time.
@@ -154,18 +204,10 @@ def get_time_series():
         - currency: Target currency (default: USD)
         - user_id: User ID filter (optional)
     """
-    end_date = datetime.now()
-    days = request.args.get('days', type=int, default=365)
-    start_date = end_date - timedelta(days=days)
-    
-    if start_str := request.args.get('start_date'):
-        start_date = datetime.fromisoformat(start_str)
-    if end_str := request.args.get('end_date'):
-        end_date = datetime.fromisoformat(end_str)
-    
+    start_date, end_date, user_id, currency = parse_range_args(default_days=365)
     granularity = request.args.get('group_by') or request.args.get('granularity', 'month')
-    user_id = request.args.get('user_id', type=int)
-    currency = request.args.get('currency', 'USD').upper()
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': f'group_by must be one of {", ".join(GRANULARITIES)}'}), 400
     
     series = UnifiedAnalytics.get_time_series(
         start_date, end_date, granularity, user_id
@@ -186,29 +228,23 @@ def get_time_series():
         ]
     }
     
-    return jsonify(convert_dict_amounts(response, currency))
+    return jsonify(_maybe_convert(response, currency))
 
 
 @analytics_bp.route('/merchants', methods=['GET'])
+@cache.cached(make_cache_key=_response_cache_key)
 def get_top_merchants():
     """
     Get top merchants by spending.
     
     Query params:
-        - start_date: YYYY-MM-DD (default: 30 days ago)
+        - days: Number of days to look back (default: 30)
+        - start_date: YYYY-MM-DD (overrides days param)
         - end_date: YYYY-MM-DD (default: today)
         - user_id: User ID filter (optional)
         - limit: Max merchants (default: 20)
     """
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=30)
-    
-    if start_str := request.args.get('start_date'):
-        start_date = datetime.fromisoformat(start_str)
-    if end_str := request.args.get('end_date'):
-        end_date = datetime.fromisoformat(end_str)
-    
-    user_id = request.args.get('user_id', type=int)
+    start_date, end_date, user_id, _ = parse_range_args()
     limit = request.args.get('limit', type=int, default=20)
     
     merchants = UnifiedAnalytics.get_top_merchants(
@@ -219,6 +255,7 @@ def get_top_merchants():
 
 
 @analytics_bp.route('/compare-sources', methods=['GET'])
+@cache.cached(make_cache_key=_response_cache_key)
 def compare_sources():
     """
     Compare receipts vs Amazon orders.
@@ -230,25 +267,83 @@ def compare_sources():
         - currency: Target currency (default: USD)
         - user_id: User ID filter (optional)
     """
-    end_date = datetime.now()
-    days = request.args.get('days', type=int, default=30)
-    start_date = end_date - timedelta(days=days)
-    
-    if start_str := request.args.get('start_date'):
-        start_date = datetime.fromisoformat(start_str)
-    if end_str := request.args.get('end_date'):
-        end_date = datetime.fromisoformat(end_str)
-    
-    user_id = request.args.get('user_id', type=int)
-    currency = request.args.get('currency', 'USD').upper()
+    start_date, end_date, user_id, currency = parse_range_args()
     
     comparison = UnifiedAnalytics.compare_sources(start_date, end_date, user_id)
     comparison['currency'] = currency
     
-    return jsonify(convert_dict_amounts(comparison, currency))
+    return jsonify(_maybe_convert(comparison, currency))
+
+
+@analytics_bp.route('/dashboard', methods=['GET'])
+@cache.cached(make_cache_key=_response_cache_key)
+def get_dashboard():
+    """
+    Get summary, categories, time series, merchants and source comparison at once.
+    
+    Query params:
+        - days: Number of days to look back (default: 30)
+        - start_date: YYYY-MM-DD (overrides days param)
+        - end_date: YYYY-MM-DD (default: today)
+        - group_by: day|week|month|year for the time series (default: month)
+        - currency: Target currency (default: USD)
+        - user_id: User ID filter (optional)
+        - limit: Max categories and merchants (default: 10)
+    """
+    start_date, end_date, user_id, currency = parse_range_args()
+    granularity = request.args.get('group_by', 'month')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': f'group_by must be one of {", ".join(GRANULARITIES)}'}), 400
+    limit = request.args.get('limit', type=int, default=10)
+    
+    dashboard = UnifiedAnalytics.get_dashboard(start_date, end_date, user_id, granularity, limit)
+    summary = dashboard['summary']
+    
+    response = {
+        'summary': {
+            'total_amount': summary.total_amount,
+            'transaction_count': summary.transaction_count,
+            'item_count': summary.item_count,
+            'avg_transaction': summary.avg_transaction,
+            'date_range': {
+                'start': summary.date_range[0].isoformat() if summary.date_range[0] else None,
+                'end': summary.date_range[1].isoformat() if summary.date_range[1] else None,
+            },
+            'by_source': summary.by_source,
+            'by_category': summary.by_category,
+        },
+        'categories': [
+            {
+                'category_name': cat.category_name,
+                'category_id': cat.category_id,
+                'total_spent': cat.total_spent,
+                'item_count': cat.item_count,
+                'transaction_count': cat.transaction_count,
+                'percentage': cat.percentage,
+                'avg_item_price': cat.avg_item_price,
+            }
+            for cat in dashboard['categories']
+        ],
+        'time_series': [
+            {
+                'period': point.period,
+                'total_spent': point.total_spent,
+                'transaction_count': point.transaction_count,
+                'receipt_total': point.receipt_total,
+                'amazon_total': point.amazon_total,
+            }
+            for point in dashboard['time_series']
+        ],
+        'merchants': dashboard['merchants'],
+        'comparison': dashboard['comparison'],
+        'currency': currency
+    }
+    
+    return jsonify(_maybe_convert(response, currency))
 
 
 @analytics_bp.route('/monthly-trends', methods=['GET'])
+@cache.cached(make_cache_key=_response_cache_key)
 def get_monthly_trends():
     """
     Get monthly spending trends for the last 12 months.
@@ -260,14 +355,13 @@ def get_monthly_trends():
     start_date = end_date - timedelta(days=365)
     user_id = request.args.get('user_id', type=int)
     
-    series = UnifiedAnalytics.get_time_series(
+    # Averages over the last 3 months and the 3 before come from the same query
+    series, recent_avg, previous_avg = UnifiedAnalytics.get_time_series_trend(
         start_date, end_date, 'month', user_id
     )
     
     # Calculate trends
     if len(series) >= 2:
-        recent_avg = sum(p.total_spent for p in series[-3:]) / 3
-        previous_avg = sum(p.total_spent for p in series[-6:-3]) / 3 if len(series) >= 6 else recent_avg
         trend_direction = 'up' if recent_avg > previous_avg else 'down' if recent_avg < previous_avg else 'stable'
         trend_percentage = ((recent_avg - previous_avg) / previous_avg * 100) if previous_avg > 0 else 0
     else:
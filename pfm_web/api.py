@@ -1,27 +1,293 @@
 """API routes for receipt synchronization with mobile app."""
 from __future__ import annotations
 
-from datetime import datetime
+import base64
+import binascii
+import json
+import logging
+from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, abort, current_app, jsonify, make_response, request
 from flask_restful import Api, Resource
+from sqlalchemy import Float, bindparam, case, cast, delete, insert, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 
-from .extensions import db
+from .analytics import RESPONSE_CACHE_VERSION_KEY
+from .extensions import cache, db
+from .streaming import stream_json_list
 from .models import Receipt, ReceiptLineItem, Shop, Category, User, AmazonOrder, AmazonOrderItem
 
+
+logger = logging.getLogger(__name__)
+
 api_bp = Blueprint("api", __name__, url_prefix="/api/v1")
 api = Api(api_bp)
 
 
+@api.representation("application/json")
+def output_json(data, code, headers=None):
+    """Encode resource responses with the app's JSON provider (orjson when installed)."""
+    # Resources build their dicts in display order, so keep it unsorted
+    dump_args = {"indent": 2} if current_app.debug else {}
+    resp = make_response(current_app.json.dumps(data, sort_keys=False, **dump_args) + "\n", code)
+    resp.headers.extend(headers or {})
+    return resp
+
+def _encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for the row at (timestamp, id)."""
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{row_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """Inverse of _encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    return datetime.fromisoformat(timestamp), int(row_id)
+
+
+# Lookups for rows the sync endpoints keep resolving by name. Kept per
+# process: shops and users are never renamed or deleted, and filling in an
+# empty shop address always goes through the database.
+_LOOKUP_CACHE_MAXSIZE = 4096
+# Shop name -> (id, address) for shops already in the database
+_SHOP_CACHE: Dict[str, tuple] = {}
+# Device user email -> user id
+_DEVICE_USER_CACHE: Dict[str, int] = {}
+
+# Rows fetched from the database per round trip while streaming a response
+_YIELD_PER = 200
+
+
+def _cache_put(lookup: Dict, key, value) -> None:
+    """Store a lookup, evicting the oldest entry once the cache is full."""
+    if len(lookup) >= _LOOKUP_CACHE_MAXSIZE:
+        lookup.pop(next(iter(lookup)))
+    lookup[key] = value
+
+
+def _insert_ignore(model, **values) -> Optional[int]:
+    """
+    INSERT a row unless it hits a unique constraint, e.g. because a concurrent
+    sync just created it.
+
+    Returns the new id, or None if the row already existed.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(model)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(model)
+    else:
+        row = model(**values)
+        db.session.add(row)
+        db.session.flush()
+        return row.id
+    return db.session.execute(
+        stmt.values(**values).on_conflict_do_nothing().returning(model.id)
+    ).scalar()
+
+
+def _shop_columns(shop_name: str, shop_address: Optional[str] = None) -> Dict:
+    """Receipt shop_id/cached name/address for the named shop, creating the shop if needed."""
+    cached = _SHOP_CACHE.get(shop_name)
+    # A cached shop without an address still needs the address fill-in below
+    if cached and (cached[1] or not shop_address):
+        shop_id, address = cached
+    else:
+        shop = _get_or_create_shop(shop_name, shop_address)
+        shop_id, address = shop.id, shop.address
+    return {"shop_id": shop_id, "shop_name_cached": shop_name, "shop_address_cached": address}
+
+
+def _assign_shop(receipt: Receipt, shop_name: str, shop_address: Optional[str] = None) -> None:
+    """Link a receipt to the named shop, creating the shop if needed."""
+    for key, value in _shop_columns(shop_name, shop_address).items():
+        setattr(receipt, key, value)
+
+
+def _get_or_create_shop(shop_name: str, shop_address: Optional[str] = None) -> Shop:
+    """Get existing shop or create new one."""
+    shop = Shop.query.filter_by(name=shop_name).first()
+    if not shop:
+        created_id = _insert_ignore(Shop, name=shop_name, address=shop_address)
+        shop = Shop.query.filter_by(name=shop_name).one()
+        if created_id is not None:
+            # Not cached yet: the insert may still be rolled back
+            return shop
+    if shop_address and not shop.address:
+        # Update shop address if it was empty
+        shop.address = shop_address
+        Receipt.query.filter_by(shop_id=shop.id).update({"shop_address_cached": shop_address})
+        return shop
+    _cache_put(_SHOP_CACHE, shop_name, (shop.id, shop.address))
+    return shop
+
+
+def _find_device_user(device_user_id: str) -> Optional[int]:
+    """Id of the user registered for a mobile device, if any."""
+    email = f"{device_user_id}@device"
+    user_id = _DEVICE_USER_CACHE.get(email)
+    if user_id is None:
+        user_id = db.session.scalar(select(User.id).filter_by(email=email))
+        if user_id is not None:
+            _cache_put(_DEVICE_USER_CACHE, email, user_id)
+    return user_id
+
+
+def _get_or_create_device_user(device_user_id: str) -> int:
+    """Id of the user for a mobile device, creating the user on first sync."""
+    user_id = _find_device_user(device_user_id)
+    if user_id is None:
+        logger.info("Creating new user for device: %s", device_user_id)
+        email = f"{device_user_id}@device"
+        user_id = _insert_ignore(User, email=email, password_hash="device_auth", role="owner")
+        if user_id is None:
+            user_id = _find_device_user(device_user_id)
+    return user_id
+
+
+def _insert_line_items(receipt_id: int, items: List[Dict]) -> None:
+    """
+    Insert a receipt's line items with a single multi-row INSERT.
+
+    Bypasses the unit of work, so ``receipt.items`` only reflects the new rows
+    once the session is committed (which expires it).
+    """
+    if not items:
+        return
+    db.session.execute(insert(ReceiptLineItem), [
+        {
+            "receipt_id": receipt_id,
+            "item_name": item_data["item_name"],
+            "quantity": float(item_data.get("quantity", 1.0)),
+            "unit_price": float(item_data["unit_price"]),
+            "total_price": float(item_data["total_price"]),
+            "description": item_data.get("description"),
+        }
+        for item_data in items
+    ])
+
+
+# Optional receipt fields copied from a create payload, with their defaults
+_RECEIPT_TEXT_FIELDS = {
+    "currency": "USD",
+    "payment_method": None,
+    "receipt_number": None,
+    "status": "processed",
+    "processing_engine": "unknown",
+    "language_detected": None,
+}
+# Optional numeric receipt fields; empty values are stored as NULL
+_RECEIPT_FLOAT_FIELDS = ("tax_amount", "confidence_score")
+
+
+# Receipt list projection, in _serialize_receipt_row's key order; rows are
+# returned as-is, so the shop fallback is computed in SQL
+_RECEIPT_COLUMNS = (
+    Receipt.id, Receipt.source, Receipt.external_ref, Receipt.issued_at,
+    Receipt.total_amount, Receipt.currency, Receipt.tax_amount, Receipt.payment_method,
+    Receipt.receipt_number, Receipt.vendor_name, Receipt.vendor_address, Receipt.shop_id,
+    case((Receipt.shop_id.is_not(None), Receipt.shop_name_cached), else_=Receipt.vendor_name).label("shop_name"),
+    case((Receipt.shop_id.is_not(None), Receipt.shop_address_cached), else_=Receipt.vendor_address).label("shop_address"),
+    Receipt.category_id, Receipt.status, Receipt.processing_engine, Receipt.confidence_score,
+    Receipt.language_detected, Receipt.attachment_path, Receipt.created_at, Receipt.updated_at,
+)
+
+# Line item projection, in _serialize_item_row's key order
+_ITEM_COLUMNS = (
+    ReceiptLineItem.id, ReceiptLineItem.item_name, ReceiptLineItem.quantity,
+    ReceiptLineItem.unit_price, ReceiptLineItem.total_price, ReceiptLineItem.category_id,
+    ReceiptLineItem.description, ReceiptLineItem.created_at,
+)
+
+
+def _serialize_receipt_row(row, items: List[Dict]) -> Dict:
+    """Convert a receipt model to a dict for the app JSON provider."""
+    return {
+        "id": row.id,
+        "source": row.source,
+        "external_ref": row.external_ref,
+        "issued_at": row.issued_at,
+        "total_amount": row.total_amount,
+        "currency": row.currency,
+        "tax_amount": row.tax_amount,
+        "payment_method": row.payment_method,
+        "receipt_number": row.receipt_number,
+        "vendor_name": row.vendor_name,
+        "vendor_address": row.vendor_address,
+        "shop_id": row.shop_id,
+        "shop_name": row.shop_name_cached if row.shop_id else row.vendor_name,
+        "shop_address": row.shop_address_cached if row.shop_id else row.vendor_address,
+        "category_id": row.category_id,
+        "status": row.status,
+        "processing_engine": row.processing_engine,
+        "confidence_score": row.confidence_score,
+        "language_detected": row.language_detected,
+        "attachment_path": row.attachment_path,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "items": items,
+    }
+
+
+def _serialize_item_row(item) -> Dict:
+    """Convert a receipt item model to a dict for the app JSON provider."""
+    return {
+        "id": item.id,
+        "item_name": item.item_name,
+        "quantity": item.quantity,
+        "unit_price": item.unit_price,
+        "total_price": item.total_price,
+        "category_id": item.category_id,
+        "description": item.description,
+        "created_at": item.created_at,
+    }
+
+
+def _serialize_receipt(receipt: Receipt) -> Dict:
+    """Convert a receipt model and its items to a dict for the app JSON provider."""
+    return _serialize_receipt_row(receipt, [_serialize_item_row(item) for item in receipt.items])
+
+
+def _receipt_row_dicts(rows) -> List[Dict]:
+    """
+    Receipt list rows as dicts with their items, loaded with one query.
+
+    Values are left raw; the app JSON provider writes datetimes as ISO 8601.
+    """
+    receipts = [row._asdict() for row in rows]
+    items_by_receipt: Dict[int, List[Dict]] = {}
+    for receipt in receipts:
+        receipt["items"] = items_by_receipt[receipt["id"]] = []
+    if items_by_receipt:
+        item_rows = db.session.execute(
+            select(ReceiptLineItem.receipt_id, *_ITEM_COLUMNS)
+            .where(ReceiptLineItem.receipt_id.in_(items_by_receipt))
+            .order_by(ReceiptLineItem.id)
+        )
+        for item in item_rows:
+            item = item._asdict()
+            items_by_receipt[item.pop("receipt_id")].append(item)
+    return receipts
+
+
 class ReceiptResource(Resource):
     """Resource for individual receipt operations."""
 
     def get(self, receipt_id: int):
         """Get a specific receipt by ID."""
-        receipt = Receipt.query.get_or_404(receipt_id)
-        return self._serialize_receipt(receipt)
+        # Same projection as the list: one row query plus one query for the items
+        receipts = _receipt_row_dicts(
+            db.session.execute(select(*_RECEIPT_COLUMNS).where(Receipt.id == receipt_id))
+        )
+        if not receipts:
+            abort(404)
+        return receipts[0]
 
     def put(self, receipt_id: int):
         """Update a specific receipt."""
@@ -34,7 +300,7 @@ class ReceiptResource(Resource):
         try:
             self._update_receipt_from_data(receipt, data)
             db.session.commit()
-            return self._serialize_receipt(receipt)
+            return _serialize_receipt(receipt)
         except Exception as e:
             db.session.rollback()
             return {"error": str(e)}, 400
@@ -51,47 +317,6 @@ class ReceiptResource(Resource):
             db.session.rollback()
             return {"error": str(e)}, 400
 
-    def _serialize_receipt(self, receipt: Receipt) -> Dict:
-        """Convert receipt model to JSON-serializable dict."""
-        return {
-            "id": receipt.id,
-            "source": receipt.source,
-            "external_ref": receipt.external_ref,
-            "issued_at": receipt.issued_at.isoformat(),
-            "total_amount": receipt.total_amount,
-            "currency": receipt.currency,
-            "tax_amount": receipt.tax_amount,
-            "payment_method": receipt.payment_method,
-            "receipt_number": receipt.receipt_number,
-            "vendor_name": receipt.vendor_name,
-            "vendor_address": receipt.vendor_address,
-            "shop_id": receipt.shop_id,
-            "shop_name": receipt.shop.name if receipt.shop else receipt.vendor_name,
-            "shop_address": receipt.shop.address if receipt.shop else receipt.vendor_address,
-            "category_id": receipt.category_id,
-            "status": receipt.status,
-            "processing_engine": receipt.processing_engine,
-            "confidence_score": receipt.confidence_score,
-            "language_detected": receipt.language_detected,
-            "attachment_path": receipt.attachment_path,
-            "created_at": receipt.created_at.isoformat(),
-            "updated_at": receipt.updated_at.isoformat(),
-            "items": [self._serialize_receipt_item(item) for item in receipt.items]
-        }
-
-    def _serialize_receipt_item(self, item: ReceiptLineItem) -> Dict:
-        """Convert receipt item model to JSON-serializable dict."""
-        return {
-            "id": item.id,
-            "item_name": item.item_name,
-            "quantity": item.quantity,
-            "unit_price": item.unit_price,
-            "total_price": item.total_price,
-            "category_id": item.category_id,
-            "description": item.description,
-            "created_at": item.created_at.isoformat(),
-        }
-
     def _update_receipt_from_data(self, receipt: Receipt, data: Dict):
         """Update receipt model from request data."""
         # Update basic receipt fields
@@ -121,44 +346,33 @@ class ReceiptResource(Resource):
         # Handle shop association
         if "shop_name" in data:
             shop_address = data.get("shop_address", data.get("vendor_address"))
-            shop = self._get_or_create_shop(data["shop_name"], shop_address)
-            receipt.shop_id = shop.id
+            _assign_shop(receipt, data["shop_name"], shop_address)
 
         # Handle items
         if "items" in data:
             # Clear existing items
-            ReceiptLineItem.query.filter_by(receipt_id=receipt.id).delete()
+            db.session.execute(
+                delete(ReceiptLineItem).where(ReceiptLineItem.receipt_id == receipt.id),
+                execution_options={"synchronize_session": False},
+            )
             
             # Add new items
-            for item_data in data["items"]:
-                item = ReceiptLineItem(
-                    receipt_id=receipt.id,
-                    item_name=item_data["item_name"],
-                    quantity=float(item_data.get("quantity", 1.0)),
-                    unit_price=float(item_data["unit_price"]),
-                    total_price=float(item_data["total_price"]),
-                    description=item_data.get("description")
-                )
-                db.session.add(item)
-
-    def _get_or_create_shop(self, shop_name: str, shop_address: Optional[str] = None) -> Shop:
-        """Get existing shop or create new one."""
-        shop = Shop.query.filter_by(name=shop_name).first()
-        if not shop:
-            shop = Shop(name=shop_name, address=shop_address)
-            db.session.add(shop)
-            db.session.flush()  # Get ID without committing
-        elif shop_address and not shop.address:
-            # Update shop address if it was empty
-            shop.address = shop_address
-        return shop
+            _insert_line_items(receipt.id, data["items"])
 
 
 class ReceiptListResource(Resource):
     """Resource for receipt collection operations."""
 
     def get(self):
-        """Get list of receipts with optional filtering."""
+        """
+        Get list of receipts with optional filtering.
+
+        Pagination is page based (``page``) unless ``cursor`` or ``after_id``
+        is present: then it is keyset based, continuing after the receipt
+        identified by the opaque ``cursor`` or by ``after_issued_at``/``after_id``
+        (pass an empty value for the first page). Keyset pages skip the COUNT
+        and OFFSET; follow ``next_cursor`` to fetch the next one.
+        """
         # Query parameters
         page = int(request.args.get("page", 1))
         per_page = min(int(request.args.get("per_page", 50)), 100)  # Max 100 per page
@@ -169,14 +383,14 @@ class ReceiptListResource(Resource):
         shop_id = request.args.get("shop_id")
         device_user_id = request.args.get("user_id")
 
-        # Build query
-        query = Receipt.query
+        # Build query over plain columns; items are loaded per page in one query
+        query = db.session.query(*_RECEIPT_COLUMNS)
 
         # Filter by user_id if provided
         if device_user_id:
-            user = User.query.filter_by(email=f"{device_user_id}@device").first()
-            if user:
-                query = query.filter(Receipt.user_id == user.id)
+            user_id = _find_device_user(device_user_id)
+            if user_id is not None:
+                query = query.filter(Receipt.user_id == user_id)
             else:
                 # No user found, return empty result
                 return {
@@ -202,15 +416,47 @@ class ReceiptListResource(Resource):
         if shop_id:
             query = query.filter(Receipt.shop_id == int(shop_id))
 
-        # Order by date descending
-        query = query.order_by(Receipt.issued_at.desc())
+        # Order by date descending; id breaks ties so keyset cursors are stable
+        query = query.order_by(Receipt.issued_at.desc(), Receipt.id.desc())
+
+        if "cursor" in request.args or "after_id" in request.args:
+            after_issued_at = after_id = None
+            if cursor := request.args.get("cursor"):
+                try:
+                    after_issued_at, after_id = _decode_cursor(cursor)
+                except ValueError as e:
+                    return {"error": str(e)}, 400
+            elif request.args.get("after_id") and request.args.get("after_issued_at"):
+                after_id = request.args.get("after_id", type=int)
+                try:
+                    after_issued_at = datetime.fromisoformat(request.args["after_issued_at"])
+                except ValueError as e:
+                    return {"error": str(e)}, 400
+            if after_id:
+                query = query.filter(
+                    tuple_(Receipt.issued_at, Receipt.id) < tuple_(after_issued_at, after_id)
+                )
+
+            # One extra row tells whether another page follows
+            receipts = query.limit(per_page + 1).all()
+            has_next = len(receipts) > per_page
+            receipts = receipts[:per_page]
+
+            return {
+                "receipts": _receipt_row_dicts(receipts),
+                "pagination": {
+                    "per_page": per_page,
+                    "has_next": has_next,
+                    "next_cursor": self._next_cursor(receipts) if has_next else None,
+                }
+            }
 
         # Paginate
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         receipts = pagination.items
 
         return {
-            "receipts": [ReceiptResource()._serialize_receipt(receipt) for receipt in receipts],
+            "receipts": _receipt_row_dicts(receipts),
             "pagination": {
                 "page": page,
                 "per_page": per_page,
@@ -218,16 +464,28 @@ class ReceiptListResource(Resource):
                 "pages": pagination.pages,
                 "has_next": pagination.has_next,
                 "has_prev": pagination.has_prev,
+                "next_cursor": self._next_cursor(receipts) if pagination.has_next else None,
             }
         }
 
+    @staticmethod
+    def _next_cursor(receipts: List) -> Optional[Dict]:
+        """Keyset cursor continuing after the last receipt of a page."""
+        if not receipts:
+            return None
+        last = receipts[-1]
+        return {
+            "cursor": _encode_cursor(last.issued_at, last.id),
+            "after_issued_at": last.issued_at,
+            "after_id": last.id,
+        }
+
     def post(self):
         """Create a new receipt."""
         data = request.get_json()
         
-        print(f"[API] Received POST request to /receipts")
-        print(f"[API] Request data keys: {list(data.keys()) if data else 'None'}")
-        print(f"[API] User ID from request: {data.get('user_id') if data else 'None'}")
+        if data and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("POST /receipts keys=%s user_id=%s", list(data), data.get("user_id"))
         
         if not data:
             return {"error": "No data provided"}, 400
@@ -241,14 +499,14 @@ class ReceiptListResource(Resource):
                 "missing_fields": missing_fields
             }, 400
 
-        # Validate data types
+        # Validate data types, keeping the parsed values for the receipt below
         try:
-            float(data["total_amount"])
+            total_amount = float(data["total_amount"])
         except (ValueError, TypeError):
             return {"error": "total_amount must be a valid number"}, 400
 
         try:
-            datetime.fromisoformat(data["issued_at"])
+            issued_at = datetime.fromisoformat(data["issued_at"])
         except (ValueError, TypeError):
             return {"error": "issued_at must be a valid ISO format date"}, 400
 
@@ -258,16 +516,8 @@ class ReceiptListResource(Resource):
             
             if device_user_id:
                 # Get or create user with device ID as email
-                user = User.query.filter_by(email=f"{device_user_id}@device").first()
-                if not user:
-                    print(f"Creating new user for device: {device_user_id}")
-                    user = User(
-                        email=f"{device_user_id}@device",
-                        password_hash="device_auth",
-                        role="owner"
-                    )
-                    db.session.add(user)
-                    db.session.flush()
+                user_id = _get_or_create_device_user(device_user_id)
+                user_email = f"{device_user_id}@device"
             else:
                 # Fallback to default user for backward compatibility
                 user = User.query.first()
@@ -275,77 +525,68 @@ class ReceiptListResource(Resource):
                     user = User(email="default@local", password_hash="dummy", role="owner")
                     db.session.add(user)
                     db.session.flush()
+                user_id, user_email = user.id, user.email
 
-            # Check for duplicates using external_ref (mobile app's local ID)
+            source = data.get("source", "mobile_app")
             external_ref = data.get("external_ref")
-            if external_ref:
-                # First check if receipt exists with ANY user (for migration from old data)
-                existing = Receipt.query.filter_by(
-                    external_ref=external_ref,
-                    source=data.get("source", "mobile_app")
-                ).first()
-                
-                if existing:
-                    # If receipt exists but with wrong user, update the user_id
-                    if existing.user_id != user.id:
-                        print(f"[API] Migrating receipt {existing.id} from user {existing.user_id} to user {user.id}")
-                        existing.user_id = user.id
-                        db.session.commit()
-                    
-                    # Return existing receipt
-                    return {
-                        "message": "Receipt already exists",
-                        "receipt": ReceiptResource()._serialize_receipt(existing),
-                        "duplicate": True
-                    }, 200
-
-            print(f"[API] Creating receipt for user_id: {user.id}, email: {user.email}")
+            logger.debug("Creating receipt for user_id: %s, email: %s", user_id, user_email)
             
-            # Create receipt
-            receipt = Receipt(
-                user_id=user.id,
-                source=data.get("source", "mobile_app"),
-                external_ref=data.get("external_ref"),
-                issued_at=datetime.fromisoformat(data["issued_at"]) if "issued_at" in data else datetime.now(),
-                total_amount=float(data["total_amount"]),
-                currency=data.get("currency", "USD"),
-                tax_amount=float(data["tax_amount"]) if data.get("tax_amount") else None,
-                payment_method=data.get("payment_method"),
-                receipt_number=data.get("receipt_number"),
+            values = {name: data.get(name, default) for name, default in _RECEIPT_TEXT_FIELDS.items()}
+            for name in _RECEIPT_FLOAT_FIELDS:
+                value = data.get(name)
+                values[name] = float(value) if value else None
+            values.update(
+                user_id=user_id,
+                source=source,
+                external_ref=external_ref,
+                issued_at=issued_at,
+                total_amount=total_amount,
                 vendor_name=data.get("vendor_name", data.get("shop_name")),
                 vendor_address=data.get("vendor_address", data.get("shop_address")),
-                status=data.get("status", "processed"),
                 raw_payload=data.get("raw_ocr_text"),
-                processing_engine=data.get("processing_engine", "unknown"),
-                confidence_score=float(data["confidence_score"]) if data.get("confidence_score") else None,
-                language_detected=data.get("language_detected"),
             )
 
             # Handle shop association
             if "shop_name" in data:
                 shop_address = data.get("shop_address", data.get("vendor_address"))
-                shop = self._get_or_create_shop(data["shop_name"], shop_address)
-                receipt.shop_id = shop.id
+                values.update(_shop_columns(data["shop_name"], shop_address))
 
-            db.session.add(receipt)
-            db.session.flush()  # Get receipt ID
+            # external_ref (mobile app's local ID) is unique, so a re-sent receipt
+            # is detected by the INSERT itself instead of a lookup beforehand
+            receipt_id = _insert_ignore(Receipt, **values)
+            if receipt_id is None:
+                existing = Receipt.query.filter_by(
+                    external_ref=external_ref,
+                    source=source
+                ).first()
+                if existing is None:
+                    # The reference belongs to a receipt from another source
+                    db.session.rollback()
+                    return {
+                        "error": "Receipt with this external reference already exists",
+                        "detail": f"external_ref {external_ref!r} is used by another source"
+                    }, 409
+                
+                # If receipt exists but with wrong user, update the user_id (migration from old data)
+                if existing.user_id != user_id:
+                    logger.info("Migrating receipt %s from user %s to user %s", existing.id, existing.user_id, user_id)
+                    existing.user_id = user_id
+                db.session.commit()
+                
+                # Return existing receipt
+                return {
+                    "message": "Receipt already exists",
+                    "receipt": _serialize_receipt(existing),
+                    "duplicate": True
+                }, 200
 
             # Add items
             if "items" in data:
-                for item_data in data["items"]:
-                    item = ReceiptLineItem(
-                        receipt_id=receipt.id,
-                        item_name=item_data["item_name"],
-                        quantity=float(item_data.get("quantity", 1.0)),
-                        unit_price=float(item_data["unit_price"]),
-                        total_price=float(item_data["total_price"]),
-                        description=item_data.get("description")
-                    )
-                    db.session.add(item)
+                _insert_line_items(receipt_id, data["items"])
 
             db.session.commit()
-            print(f"[API] Receipt created successfully with ID: {receipt.id}")
-            return ReceiptResource()._serialize_receipt(receipt), 201
+            logger.debug("Receipt created with ID: %s", receipt_id)
+            return _serialize_receipt(db.session.get(Receipt, receipt_id)), 201
 
         except IntegrityError as e:
             db.session.rollback()
@@ -368,42 +609,49 @@ class ReceiptListResource(Resource):
                 "type": type(e).__name__
             }, 400
 
-    def _get_or_create_shop(self, shop_name: str, shop_address: Optional[str] = None) -> Shop:
-        """Get existing shop or create new one."""
-        shop = Shop.query.filter_by(name=shop_name).first()
-        if not shop:
-            shop = Shop(name=shop_name, address=shop_address)
-            db.session.add(shop)
-            db.session.flush()
-        elif shop_address and not shop.address:
-            # Update shop address if it was empty
-            shop.address = shop_address
-        return shop
+
+# Seconds a /sync/status response is reused; short because its 24h count and
+# last_sync move with the clock even when no receipt changes
+SYNC_STATUS_CACHE_TIMEOUT = 30
+
+
+def _sync_status_cache_key(*args, **kwargs) -> str:
+    """Cache key for /sync/status; the analytics data version moves on every receipt commit."""
+    return f"sync-status:{cache.get(RESPONSE_CACHE_VERSION_KEY) or 0}"
+
+
+# Per-currency totals plus conditional status/recency counts in one pass; built
+# once so requests skip statement construction and go straight to the SQL cache
+_SYNC_STATS_STMT = select(
+    Receipt.currency,
+    db.func.count(Receipt.id).label("count"),
+    db.func.sum(Receipt.total_amount).label("total"),
+    db.func.sum(case((Receipt.status == "pending", 1), else_=0)).label("pending"),
+    db.func.sum(case((Receipt.status == "processed", 1), else_=0)).label("processed"),
+    db.func.sum(case((Receipt.created_at >= bindparam("since"), 1), else_=0)).label("recent"),
+).group_by(Receipt.currency)
 
 
 class SyncStatusResource(Resource):
     """Resource for checking sync status and stats."""
 
+    @cache.cached(timeout=SYNC_STATUS_CACHE_TIMEOUT, make_cache_key=_sync_status_cache_key)
     def get(self):
         """Get sync statistics and status."""
-        total_receipts = Receipt.query.count()
-        pending_receipts = Receipt.query.filter_by(status="pending").count()
-        processed_receipts = Receipt.query.filter_by(status="processed").count()
-        
-        # Get recent receipts (last 24 hours)
-        last_24h = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        recent_receipts = Receipt.query.filter(Receipt.created_at >= last_24h).count()
+        # created_at defaults to CURRENT_TIMESTAMP, which is UTC
+        last_24h = datetime.utcnow() - timedelta(hours=24)
 
-        # Get currency breakdown
-        currency_stats = db.session.query(
-            Receipt.currency,
-            db.func.count(Receipt.id).label('count'),
-            db.func.sum(Receipt.total_amount).label('total')
-        ).group_by(Receipt.currency).all()
+        # Summed across currencies below
+        currency_stats = db.session.execute(_SYNC_STATS_STMT, {"since": last_24h}).all()
+
+        total_receipts = sum(stat.count for stat in currency_stats)
+        pending_receipts = sum(stat.pending for stat in currency_stats)
+        processed_receipts = sum(stat.processed for stat in currency_stats)
+        recent_receipts = sum(stat.recent for stat in currency_stats)
 
         return {
             "sync_status": "active",
-            "last_sync": datetime.now().isoformat(),
+            "last_sync": datetime.now(),
             "statistics": {
                 "total_receipts": total_receipts,
                 "pending_receipts": pending_receipts,
@@ -427,52 +675,101 @@ api.add_resource(ReceiptResource, "/receipts/<int:receipt_id>")
 api.add_resource(SyncStatusResource, "/sync/status")
 
 
+# Amazon order projection in the mobile sync format, labelled with its output keys
+_AMAZON_ORDER_COLUMNS = (
+    AmazonOrder.id,
+    AmazonOrder.order_number.label("order_id"),  # Use order_number instead of order_id
+    AmazonOrder.order_date,
+    cast(AmazonOrder.total_amount, Float).label("total_amount"),
+    AmazonOrder.currency,
+    AmazonOrder.shipment_status.label("status"),  # Use shipment_status instead of status
+    AmazonOrder.user_id,
+    User.email.label("user_email"),
+    AmazonOrder.item_count.label("items_count"),
+)
+
+
 @api_bp.route("/amazon-orders")
 def get_amazon_orders_api():
-    """Get Amazon orders for syncing to mobile app."""
+    """
+    Get Amazon orders for syncing to mobile app.
+    
+    Paginated by ``limit``/``offset``, or by keyset when ``cursor`` is present
+    (empty for the first page): keyset pages skip the COUNT and OFFSET and
+    return ``next_cursor`` instead of ``total``.
+    """
     user_id = request.args.get('user_id', type=int)
     limit = request.args.get('limit', type=int, default=1000)
     offset = request.args.get('offset', type=int, default=0)
+    if limit < 1:
+        return jsonify({'error': 'limit must be at least 1'}), 400
     
-    query = AmazonOrder.query
+    # Plain columns in output form; rows are written as-is
+    query = db.session.query(*_AMAZON_ORDER_COLUMNS).outerjoin(AmazonOrder.user)
     
     if user_id:
-        query = query.filter_by(user_id=user_id)
+        query = query.filter(AmazonOrder.user_id == user_id)
+    
+    # id breaks order_date ties so keyset cursors are stable
+    query = query.order_by(AmazonOrder.order_date.desc(), AmazonOrder.id.desc())
+    
+    if "cursor" in request.args:
+        if cursor := request.args.get("cursor"):
+            try:
+                after_date, after_id = _decode_cursor(cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            query = query.filter(
+                tuple_(AmazonOrder.order_date, AmazonOrder.id) < tuple_(after_date, after_id)
+            )
+        
+        # One extra row tells whether another page follows; it is read but not sent
+        orders = query.limit(limit + 1).yield_per(_YIELD_PER)
+        has_more = False
+        last_key = None
+        
+        def serialize_page():
+            nonlocal has_more, last_key
+            for index, order in enumerate(orders):
+                if index == limit:
+                    has_more = True
+                    break
+                last_key = (order.order_date, order.id)
+                yield order._asdict()
+        
+        return stream_json_list('orders', serialize_page(), lambda: {
+            'limit': limit,
+            'has_more': has_more,
+            'next_cursor': _encode_cursor(*last_key) if has_more and last_key is not None else None,
+        })
     
     # Get total count
     total = query.count()
     
-    # Get paginated results
-    orders = query.order_by(AmazonOrder.order_date.desc()).limit(limit).offset(offset).all()
+    # Stream the page rather than building the whole list before encoding it
+    orders = query.limit(limit).offset(offset).yield_per(_YIELD_PER)
+    streamed = 0
     
-    # Serialize orders
-    serialized_orders = []
-    for order in orders:
-        serialized_orders.append({
-            'id': order.id,
-            'order_id': order.order_number,  # Use order_number instead of order_id
-            'order_date': order.order_date.isoformat(),
-            'total_amount': float(order.total_amount),
-            'currency': order.currency,
-            'status': order.shipment_status,  # Use shipment_status instead of status
-            'user_id': order.user_id,
-            'user_email': order.user.email if order.user else None,
-            'items_count': len(order.items) if order.items else 0
-        })
+    def serialize():
+        nonlocal streamed
+        for order in orders:
+            streamed += 1
+            yield order._asdict()
     
-    return jsonify({
-        'orders': serialized_orders,
+    return stream_json_list('orders', serialize(), lambda: {
         'total': total,
         'limit': limit,
         'offset': offset,
-        'has_more': (offset + len(orders)) < total
+        'has_more': (offset + streamed) < total,
     })
 
 
 @api_bp.route("/amazon-orders/<int:order_id>/items")
 def get_amazon_order_items_api(order_id):
     """Get items for a specific Amazon order."""
-    order = AmazonOrder.query.get_or_404(order_id)
+    order = AmazonOrder.query.options(
+        selectinload(AmazonOrder.items).joinedload(AmazonOrderItem.category)
+    ).get_or_404(order_id)
     
     # Serialize items
     serialized_items = []
@@ -494,10 +791,15 @@ def get_amazon_order_items_api(order_id):
     })
 
 
+# Constant body, encoded once; probes hit this endpoint constantly
+_HEALTH_BODY = json.dumps({"status": "ok", "service": "pfm-api", "version": "1.0.0"}).encode() + b"\n"
+
+
 @api_bp.route("/health")
 def health_check():
     """Health check endpoint."""
-    return jsonify({"status": "ok", "service": "pfm-api", "version": "1.0.0"})
+    # A fresh Response per request: after_request hooks may modify it
+    return Response(_HEALTH_BODY, mimetype="application/json")
 
 
 @api_bp.route("/spending/unified")
@@ -512,13 +814,9 @@ def unified_spending_api():
     limit = request.args.get('limit', type=int, default=100)
     
     # Get unified spending data
-    items = SpendingAnalyzer.get_unified_spending(user_id=user_id, limit=limit)
-    
-    # Apply filters
-    if source:
-        items = [item for item in items if item.source == source]
-    if currency:
-        items = [item for item in items if item.currency == currency]
+    items = SpendingAnalyzer.get_unified_spending(
+        user_id=user_id, source=source, currency=currency, limit=limit
+    )
     
     # Get summary
     summary = SpendingAnalyzer.get_spending_summary(user_id=user_id)
@@ -529,7 +827,7 @@ def unified_spending_api():
         serialized_items.append({
             'id': item.id,
             'source': item.source,
-            'date': item.date.isoformat(),
+            'date': item.date,
             'vendor': item.vendor,
             'total_amount': item.total_amount,
             'currency': item.currency,
@@ -4,9 +4,6 @@ from flask import current_app
 from flask.cli import with_appcontext
 from pathlib import Path
 
-from ..services.email_sync.sync_service import EmailSyncService
-from ..services.email_sync.gmail_client import setup_oauth_interactive
-
 
 @click.group()
 def email_sync():
@@ -20,6 +17,8 @@ def email_sync():
 @with_appcontext
 def sync_now(user_id, days):
     """Manually trigger email sync for a user."""
+    from ..services.email_sync.sync_service import EmailSyncService
+    
     token_file = Path(current_app.config.get('GMAIL_TOKEN_FILE', 'data/gmail_token.pickle'))
     
     if not token_file.exists():
@@ -53,6 +52,8 @@ def sync_now(user_id, days):
 @with_appcontext
 def setup_oauth():
     """Interactive OAuth2 setup for Gmail."""
+    from ..services.email_sync.gmail_client import setup_oauth_interactive
+    
     client_id = current_app.config.get('GMAIL_CLIENT_ID')
     client_secret = current_app.config.get('GMAIL_CLIENT_SECRET')
     token_file = Path(current_app.config.get('GMAIL_TOKEN_FILE', 'data/gmail_token.pickle'))
@@ -12,9 +12,20 @@ class BaseConfig:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///pfm.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {}
+    # pool_pre_ping drops connections the server closed; a larger compiled
+    # statement cache keeps the many repeated small query shapes compiled
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_pre_ping": True,
+        "query_cache_size": int(os.getenv("SQLALCHEMY_QUERY_CACHE_SIZE", "1200")),
+    }
     SQLALCHEMY_ECHO = bool(int(os.getenv("SQLALCHEMY_ECHO", "0")))
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    # Skip HTTP blueprint registration (CLI-only processes)
+    MINIMAL = bool(int(os.getenv("PFM_MINIMAL", "0")))
+    # Response cache; set CACHE_TYPE=RedisCache and CACHE_REDIS_URL to share it across workers
+    CACHE_TYPE = os.getenv("CACHE_TYPE", "SimpleCache")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", "300"))
     
     # Gmail API Configuration
     GMAIL_CLIENT_ID = os.getenv("GMAIL_CLIENT_ID")
@@ -35,6 +46,8 @@ class DevelopmentConfig(BaseConfig):
 class TestingConfig(BaseConfig):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URL", "sqlite:///:memory:")
+    CACHE_TYPE = "NullCache"
+    CACHE_NO_NULL_WARNING = True
 
 
 class ProductionConfig(BaseConfig):
@@ -63,4 +76,20 @@ def adjust_sqlite_connect_args(app_config: BaseConfig) -> None:
         connect_args = engine_options.get("connect_args", {})
         connect_args.setdefault("check_same_thread", False)
         engine_options["connect_args"] = connect_args
+        if ":memory:" not in uri and uri.rstrip("/") != "sqlite:":
+            # File databases use a QueuePool; keep enough connections for
+            # concurrent readers now that WAL lets them run alongside a writer
+            engine_options.setdefault("pool_size", int(os.getenv("DB_POOL_SIZE", "10")))
         app_config.SQLALCHEMY_ENGINE_OPTIONS = engine_options
+
+
+def adjust_pool_options(app_config: BaseConfig) -> None:
+    """Size the connection pool for server databases (SQLite keeps its own pool)."""
+    uri = app_config.SQLALCHEMY_DATABASE_URI
+    if uri.startswith("sqlite"):
+        return
+    engine_options = dict(app_config.SQLALCHEMY_ENGINE_OPTIONS)
+    engine_options.setdefault("pool_size", int(os.getenv("DB_POOL_SIZE", "20")))
+    engine_options.setdefault("max_overflow", int(os.getenv("DB_MAX_OVERFLOW", "10")))
+    engine_options.setdefault("pool_recycle", int(os.getenv("DB_POOL_RECYCLE", "1800")))
+    app_config.SQLALCHEMY_ENGINE_OPTIONS = engine_options
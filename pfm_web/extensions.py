@@ -1,7 +1,34 @@
+import sqlite3
+
+from flask_caching import Cache
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
 # Instantiate extensions without app context; they will be configured in create_app
 # Use naming that matches Flask community conventions to simplify future integration.
 db = SQLAlchemy()
 migrate = Migrate()
+cache = Cache()
+
+# Applied to every new SQLite connection: WAL lets readers proceed while a
+# writer commits, and NORMAL sync is durable enough under WAL
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
@@ -1,15 +1,20 @@
 """Import utilities for ingesting data exports into the database."""
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Iterable
 
+from sqlalchemy import insert, select
+
 from .extensions import db
+from .json_provider import dump_json, load_json
 from .models import Receipt, ReceiptLineItem, Shop
 
+# Receipts written per round trip during an import
+BATCH_SIZE = 500
+
 
 @dataclass
 class ImportResult:
@@ -20,79 +25,129 @@ class ImportResult:
 
 def load_receipts_export(path: Path) -> dict:
     """Load a JSON export file produced by the Android app."""
-    payload = json.loads(path.read_text())
+    payload = load_json(path.read_bytes())
     if "receipts" not in payload:
         raise ValueError("Invalid export: missing receipts key")
     return payload
 
 
 def import_receipts_export(payload: dict) -> ImportResult:
-    """Persist receipts payload into the relational schema."""
+    """
+    Persist receipts payload into the relational schema.
+
+    Receipts are written in batches of ``BATCH_SIZE``: existing external refs
+    are looked up with one query per batch, and new receipts and their line
+    items are inserted with one executemany each. Everything is committed
+    together at the end.
+    """
     result = ImportResult()
+    records = payload.get("receipts", [])
+    # External refs already written by this import; repeats in the payload are skipped
+    seen: set[str] = set()
+    # Shop name -> (id, address), filled per batch for the shops it needs
+    shops: dict[str, tuple[int, str | None]] = {}
 
-    for receipt_data in payload.get("receipts", []):
-        created = _upsert_receipt(receipt_data)
-        if created:
-            result.receipts_created += 1
-            result.line_items_created += len(receipt_data.get("items", []))
-        else:
-            result.receipts_skipped += 1
+    for start in range(0, len(records), BATCH_SIZE):
+        _import_batch(records[start:start + BATCH_SIZE], seen, shops, result)
 
     db.session.commit()
     return result
 
 
-def _upsert_receipt(receipt_data: dict) -> bool:
-    external_ref = str(receipt_data["id"])
-    existing = Receipt.query.filter_by(external_ref=external_ref).first()
-    if existing:
-        return False
-
-    receipt = Receipt(
-        external_ref=external_ref,
-        source="android",
-        issued_at=_parse_datetime(receipt_data.get("date")),
-        total_amount=receipt_data.get("total_amount"),
-        currency=receipt_data.get("currency", "USD"),
-        tax_amount=receipt_data.get("tax_amount"),
-        payment_method=receipt_data.get("payment_method"),
-        receipt_number=receipt_data.get("receipt_number"),
-        raw_payload=json.dumps(receipt_data, ensure_ascii=False),
-        processing_engine=receipt_data.get("processing_engine", "unknown"),
-        confidence_score=receipt_data.get("confidence_score"),
-        language_detected=receipt_data.get("language_detected"),
-        vendor_name=receipt_data.get("shop_name"),
-    )
-
-    shop = _get_or_create_shop(receipt_data.get("shop_name"))
-    receipt.shop = shop
-
-    for item in receipt_data.get("items", []):
-        receipt.items.append(_build_receipt_item(item))
-
-    db.session.add(receipt)
-    return True
-
-
-def _build_receipt_item(item_data: dict) -> ReceiptLineItem:
-    return ReceiptLineItem(
-        item_name=item_data.get("name"),
-        quantity=item_data.get("quantity", 1.0),
-        unit_price=item_data.get("unit_price"),
-        total_price=item_data.get("total_price"),
-        description=item_data.get("description"),
-    )
-
-
-def _get_or_create_shop(name: str | None) -> Shop | None:
-    if not name:
-        return None
-    shop = Shop.query.filter_by(name=name).first()
-    if shop:
-        return shop
-    shop = Shop(name=name)
-    db.session.add(shop)
-    return shop
+def _import_batch(
+    records: list[dict],
+    seen: set[str],
+    shops: dict[str, tuple[int, str | None]],
+    result: ImportResult,
+) -> None:
+    refs = [str(receipt_data["id"]) for receipt_data in records]
+    seen.update(db.session.scalars(select(Receipt.external_ref).where(Receipt.external_ref.in_(refs))))
+
+    new_records = {}
+    for external_ref, receipt_data in zip(refs, records):
+        if external_ref in seen:
+            result.receipts_skipped += 1
+            continue
+        seen.add(external_ref)
+        new_records[external_ref] = receipt_data
+
+    if not new_records:
+        return
+    _load_shops({data.get("shop_name") for data in new_records.values()} - {None, ""}, shops)
+    receipt_rows = [
+        _build_receipt_row(external_ref, receipt_data, shops)
+        for external_ref, receipt_data in new_records.items()
+    ]
+    receipt_ids = dict(db.session.execute(
+        insert(Receipt).returning(Receipt.external_ref, Receipt.id), receipt_rows
+    ).all())
+    result.receipts_created += len(receipt_rows)
+
+    item_rows = [
+        _build_receipt_item_row(receipt_ids[external_ref], item)
+        for external_ref, receipt_data in new_records.items()
+        for item in receipt_data.get("items", [])
+    ]
+    if item_rows:
+        db.session.execute(insert(ReceiptLineItem), item_rows)
+    result.line_items_created += len(item_rows)
+
+
+def _load_shops(names: set[str], shops: dict[str, tuple[int, str | None]]) -> None:
+    """Add the named shops to ``shops``, inserting the ones not stored yet."""
+    names -= shops.keys()
+    if not names:
+        return
+    for name, shop_id, address in db.session.execute(
+        select(Shop.name, Shop.id, Shop.address).where(Shop.name.in_(names))
+    ):
+        shops[name] = (shop_id, address)
+    missing = names - shops.keys()
+    if missing:
+        created = db.session.execute(
+            insert(Shop).returning(Shop.name, Shop.id), [{"name": name} for name in sorted(missing)]
+        )
+        for name, shop_id in created:
+            shops[name] = (shop_id, None)
+
+
+def _build_receipt_row(
+    external_ref: str,
+    receipt_data: dict,
+    shops: dict[str, tuple[int, str | None]],
+) -> dict:
+    shop_name = receipt_data.get("shop_name")
+    shop_id, shop_address = shops.get(shop_name, (None, None))
+    return {
+        "external_ref": external_ref,
+        "source": "android",
+        "issued_at": _parse_datetime(receipt_data.get("date")),
+        "total_amount": receipt_data.get("total_amount"),
+        "currency": receipt_data.get("currency", "USD"),
+        "tax_amount": receipt_data.get("tax_amount"),
+        "payment_method": receipt_data.get("payment_method"),
+        "receipt_number": receipt_data.get("receipt_number"),
+        "raw_payload": dump_json(receipt_data),
+        "processing_engine": receipt_data.get("processing_engine", "unknown"),
+        "confidence_score": receipt_data.get("confidence_score"),
+        "language_detected": receipt_data.get("language_detected"),
+        "vendor_name": receipt_data.get("shop_name"),
+        # Same values Receipt.set_shop() would store
+        "shop_id": shop_id,
+        "shop_name_cached": shop_name if shop_id else None,
+        "shop_address_cached": shop_address,
+    }
+
+
+def _build_receipt_item_row(receipt_id: int, item_data: dict) -> dict:
+    return {
+        "receipt_id": receipt_id,
+        "item_name": item_data.get("name"),
+        "quantity": item_data.get("quantity", 1.0),
+        "unit_price": item_data.get("unit_price"),
+        "total_price": item_data.get("total_price"),
+        "description": item_data.get("description"),
+    }
 
 
 def _parse_datetime(value: str | None) -> datetime:
@@ -0,0 +1,94 @@
+"""JSON providers for ``jsonify`` and ``app.json``, plus payload helpers."""
+from __future__ import annotations
+
+import json
+import typing as t
+from datetime import date, time
+
+from flask.json.provider import DefaultJSONProvider
+
+try:  # Optional fast JSON encoder; the stdlib-based provider is used without it
+    import orjson
+except ImportError:  # pragma: no cover - keeps the stdlib encoder
+    orjson = None
+
+# dumps() arguments the orjson path understands; anything else (e.g. ``cls``)
+# goes to the stdlib implementation
+_ORJSON_DUMP_ARGS = frozenset({"default", "ensure_ascii", "indent", "separators", "sort_keys"})
+
+
+def _orjson_layout(kwargs: dict[str, t.Any]) -> bool:
+    """Whether orjson can reproduce the escaping and layout ``kwargs`` ask for."""
+    if kwargs.get("ensure_ascii"):
+        return False
+    indent = kwargs.get("indent")
+    if indent:
+        return indent == 2 and kwargs.get("separators") in (None, (",", ": "))
+    return kwargs.get("separators") in (None, (",", ":"))
+
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """
+    Flask's provider, but dates and times are written as ISO 8601.
+
+    Serializers can then hand over raw ``datetime`` values instead of calling
+    ``isoformat()`` themselves, with the same output as before.
+    """
+
+    @staticmethod
+    def default(o: t.Any) -> t.Any:
+        if isinstance(o, (date, time)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+
+class OrjsonProvider(IsoJSONProvider):
+    """
+    Serialize with orjson; the output differs from the stdlib provider's.
+
+    orjson writes dates and times natively in ``isoformat()`` form, and keys
+    stay sorted per :attr:`sort_keys`. Unlike :func:`json.dumps`:
+
+    - non-ASCII text is written as UTF-8, not ``\\uXXXX`` escapes, whatever
+      :attr:`ensure_ascii` is set to
+    - without ``indent`` or ``separators`` the output is compact, as with
+      ``separators=(",", ":")``
+
+    Calls that explicitly pass ``ensure_ascii=True``, an indent other than
+    two spaces or other separators are encoded by the stdlib provider instead.
+    """
+
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        if not _ORJSON_DUMP_ARGS.issuperset(kwargs) or not _orjson_layout(kwargs):
+            return super().dumps(obj, **kwargs)
+
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode()
+
+    def loads(self, s: str | bytes, **kwargs: t.Any) -> t.Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def init_app(app) -> None:
+    """Install :class:`OrjsonProvider`, or :class:`IsoJSONProvider` without orjson."""
+    app.json = OrjsonProvider(app) if orjson is not None else IsoJSONProvider(app)
+
+
+def dump_json(value: t.Any) -> str:
+    """Serialize a stored payload to a JSON string, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, ensure_ascii=False)
+
+
+def load_json(data: str | bytes) -> t.Any:
+    """Parse a JSON document, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
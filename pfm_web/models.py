@@ -4,7 +4,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Index, UniqueConstraint, func
+from sqlalchemy import Index, UniqueConstraint, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .extensions import db
@@ -98,6 +98,13 @@ class Receipt(db.Model, TimestampMixin):
     __table_args__ = (
         Index("idx_receipts_user_status", "user_id", "status"),
         Index("idx_receipts_source_external", "source", "external_ref"),
+        # Analytics filters (user_id equality, issued_at range, status != 'cancelled')
+        # and per-user keyset pagination on (issued_at, id)
+        Index("ix_receipts_user_issued_id_status", "user_id", "issued_at", "id", "status"),
+        Index("ix_receipts_issued_status", "issued_at", "status"),
+        # Receipt list filters, ordered by issued_at
+        Index("ix_receipts_status_issued", "status", "issued_at"),
+        Index("ix_receipts_shop_issued", "shop_id", "issued_at"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -113,6 +120,9 @@ class Receipt(db.Model, TimestampMixin):
     vendor_name: Mapped[Optional[str]] = mapped_column(db.String(255))
     vendor_address: Mapped[Optional[str]] = mapped_column(db.String(500))
     shop_id: Mapped[Optional[int]] = mapped_column(db.ForeignKey("shops.id"))
+    # Copies of the linked shop's name/address so reads skip the shops join; see set_shop()
+    shop_name_cached: Mapped[Optional[str]] = mapped_column(db.String(255))
+    shop_address_cached: Mapped[Optional[str]] = mapped_column(db.String(255))
     category_id: Mapped[Optional[int]] = mapped_column(db.ForeignKey("categories.id"))
     status: Mapped[str] = mapped_column(db.String(32), nullable=False, default="pending")
     raw_payload: Mapped[Optional[str]] = mapped_column(db.Text)
@@ -128,6 +138,12 @@ class Receipt(db.Model, TimestampMixin):
     bank_transactions: Mapped[list["BankTransaction"]] = relationship(back_populates="receipt")
     amazon_orders: Mapped[list["AmazonOrder"]] = relationship(back_populates="receipt")
 
+    def set_shop(self, shop: Optional[Shop]) -> None:
+        """Link the receipt to a shop and refresh the cached shop name/address."""
+        self.shop = shop
+        self.shop_name_cached = shop.name if shop else None
+        self.shop_address_cached = shop.address if shop else None
+
 
 class ReceiptLineItem(db.Model, CreatedAtMixin):
     __tablename__ = "receipt_line_items"
@@ -144,7 +160,10 @@ class ReceiptLineItem(db.Model, CreatedAtMixin):
     receipt: Mapped[Receipt] = relationship(back_populates="items")
     category: Mapped[Optional[Category]] = relationship(back_populates="receipt_items")
 
-    __table_args__ = (Index("idx_receipt_line_items_receipt", "receipt_id"),)
+    __table_args__ = (
+        Index("idx_receipt_line_items_receipt", "receipt_id"),
+        Index("ix_receipt_line_items_receipt_category_price", "receipt_id", "category_id", "total_price"),
+    )
 
 
 class BankAccount(db.Model, CreatedAtMixin):
@@ -203,6 +222,10 @@ class BankTransaction(db.Model, TimestampMixin):
 
 class AmazonOrder(db.Model, CreatedAtMixin):
     __tablename__ = "amazon_orders"
+    __table_args__ = (
+        Index("ix_amazon_orders_order_date", "order_date"),
+        Index("ix_amazon_orders_year_month", text("date_trunc('month', order_date)")).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[Optional[int]] = mapped_column(db.ForeignKey("users.id"))
@@ -214,6 +237,7 @@ class AmazonOrder(db.Model, CreatedAtMixin):
     shipment_status: Mapped[Optional[str]] = mapped_column(db.String(50))
     raw_payload: Mapped[Optional[str]] = mapped_column(db.Text)
     receipt_id: Mapped[Optional[int]] = mapped_column(db.ForeignKey("receipts.id"))
+    item_count: Mapped[int] = mapped_column(db.Integer, nullable=False, default=0, server_default="0")
 
     user: Mapped[Optional[User]] = relationship(back_populates="amazon_orders")
     receipt: Mapped[Optional[Receipt]] = relationship(back_populates="amazon_orders")
@@ -222,7 +246,16 @@ class AmazonOrder(db.Model, CreatedAtMixin):
 
 class AmazonOrderItem(db.Model, CreatedAtMixin):
     __tablename__ = "amazon_order_items"
-    __table_args__ = (Index("idx_amazon_order_items_order", "amazon_order_id"),)
+    __table_args__ = (
+        Index("idx_amazon_order_items_order", "amazon_order_id"),
+        Index("ix_amazon_order_items_category_price", "category_id", "total_price"),
+        Index(
+            "ix_amazon_order_items_category_null",
+            text("total_price DESC"),
+            postgresql_where=text("category_id IS NULL"),
+            sqlite_where=text("category_id IS NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     amazon_order_id: Mapped[int] = mapped_column(db.ForeignKey("amazon_orders.id"), nullable=False)
@@ -239,6 +272,24 @@ class AmazonOrderItem(db.Model, CreatedAtMixin):
     category: Mapped[Optional[Category]] = relationship(back_populates="amazon_items")
 
 
+class AmazonProductStat(db.Model):
+    """Per-product spending totals, rebuilt from amazon_order_items after imports."""
+
+    __tablename__ = "amazon_product_stats"
+    __table_args__ = (
+        Index("ix_amazon_product_stats_total_spent", "total_spent"),
+        Index("ix_amazon_product_stats_category_spent", "category_id", "total_spent"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    item_name: Mapped[str] = mapped_column(db.String(255), nullable=False)
+    asin: Mapped[Optional[str]] = mapped_column(db.String(50))
+    category_id: Mapped[Optional[int]] = mapped_column(db.ForeignKey("categories.id"))
+    total_spent: Mapped[float] = mapped_column(db.Float, nullable=False)
+    total_quantity: Mapped[float] = mapped_column(db.Float, nullable=False)
+    purchase_count: Mapped[int] = mapped_column(db.Integer, nullable=False)
+
+
 class CleanupIssue(db.Model, CreatedAtMixin):
     __tablename__ = "cleanup_issues"
     __table_args__ = (
@@ -37,6 +37,18 @@ class AmazonEmailParser:
     DATE_PATTERN = re.compile(r'Order\s+Date:?\s*(\w+\s+\d+,\s+\d{4})', re.IGNORECASE)
     PRICE_PATTERN = re.compile(r'\$?([\d,]+\.\d{2})')
     ASIN_PATTERN = re.compile(r'ASIN:?\s*([A-Z0-9]{10})', re.IGNORECASE)
+    QTY_PATTERN = re.compile(r'(?:Qty|Quantity):?\s*(\d+)', re.IGNORECASE)
+    # Stripped from item names
+    NAME_CLEAN_PRICE = re.compile(r'\$[\d,]+\.\d{2}')
+    NAME_CLEAN_QTY = re.compile(r'Qty:?\s*\d+', re.IGNORECASE)
+    # Tried in order: "Total" alone also matches inside "Subtotal", so the
+    # specific labels must win even when they appear later in the email
+    TOTAL_PATTERNS = (
+        re.compile(r'Order\s+Total:?\s*\$?([\d,]+\.\d{2})', re.IGNORECASE),
+        re.compile(r'Grand\s+Total:?\s*\$?([\d,]+\.\d{2})', re.IGNORECASE),
+        re.compile(r'Total:?\s*\$?([\d,]+\.\d{2})', re.IGNORECASE),
+    )
+    TEXT_TOTAL_PATTERN = re.compile(r'(?:Order|Grand)?\s*Total:?\s*\$?([\d,]+\.\d{2})', re.IGNORECASE)
     
     def parse_email(self, email_html: str, email_text: str = None) -> Optional[ParsedAmazonOrder]:
         """
@@ -57,24 +69,26 @@ class AmazonEmailParser:
     
     def _parse_html(self, html: str) -> Optional[ParsedAmazonOrder]:
         """Parse HTML email body."""
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = BeautifulSoup(html, 'lxml')
+        # Walk the document for its text once; every extractor below searches it
+        text_content = soup.get_text()
         
         # Extract order ID
-        order_id = self._extract_order_id(soup)
+        order_id = self._extract_order_id(text_content)
         if not order_id:
             return None
         
         # Extract order date
-        order_date = self._extract_order_date(soup)
+        order_date = self._extract_order_date(text_content)
         
         # Extract items
-        items = self._extract_items(soup, html)
+        items = self._extract_items(soup, text_content)
         
         # Extract total
-        total = self._extract_total(soup)
+        total = self._extract_total(text_content)
         
         # Extract shipment status
-        status = self._extract_shipment_status(soup)
+        status = self._extract_shipment_status(text_content)
         
         return ParsedAmazonOrder(
             order_id=order_id,
@@ -84,18 +98,16 @@ class AmazonEmailParser:
             shipment_status=status
         )
     
-    def _extract_order_id(self, soup: BeautifulSoup) -> Optional[str]:
-        """Find order number in HTML."""
+    def _extract_order_id(self, text_content: str) -> Optional[str]:
+        """Find order number in the email text."""
         # Try common patterns
-        text_content = soup.get_text()
         match = self.ORDER_ID_PATTERN.search(text_content)
         if match:
             return match.group(1)
         return None
     
-    def _extract_order_date(self, soup: BeautifulSoup) -> datetime:
+    def _extract_order_date(self, text_content: str) -> datetime:
         """Extract order date."""
-        text_content = soup.get_text()
         match = self.DATE_PATTERN.search(text_content)
         if match:
             date_str = match.group(1)
@@ -109,36 +121,65 @@ class AmazonEmailParser:
                     pass
         return datetime.now()  # Fallback
     
-    def _extract_items(self, soup: BeautifulSoup, html: str) -> list[ParsedOrderItem]:
+    def _extract_items(self, soup: BeautifulSoup, text_content: str) -> list[ParsedOrderItem]:
         """Extract item details from email."""
         items = []
+        # Keys of the items above, so duplicate checks don't rescan the list
+        seen = set()
         
         # Strategy 1: Look for product tables
         for table in soup.find_all('table'):
-            table_text = table.get_text()
-            if 'product' in table_text.lower() or 'item' in table_text.lower():
+            table_text = table.get_text().lower()
+            if 'product' in table_text or 'item' in table_text:
                 for row in table.find_all('tr'):
                     item = self._parse_item_row(row)
                     if item:
                         items.append(item)
+                        seen.add(self._item_key(item))
         
         # Strategy 2: Look for div containers with product info
+        div_text_lengths = self._div_text_lengths(soup)
         for div in soup.find_all('div'):
+            # Check if this looks like a product div before building its text;
+            # wrapper divs would otherwise copy most of the email each
+            if not 10 < div_text_lengths.get(id(div), 0) < 500:
+                continue
             div_text = div.get_text()
             # Look for price indicators
             if self.PRICE_PATTERN.search(div_text):
-                # Check if this looks like a product div
-                if len(div_text) > 10 and len(div_text) < 500:
-                    item = self._parse_item_from_text(div_text)
-                    if item and item not in items:
-                        items.append(item)
+                item = self._parse_item_from_text(div_text)
+                key = item and self._item_key(item)
+                if item and key not in seen:
+                    seen.add(key)
+                    items.append(item)
         
         # Strategy 3: Fallback - scan all text for patterns
         if not items:
-            items = self._extract_items_from_full_text(soup.get_text())
+            items = self._extract_items_from_full_text(text_content)
         
         return items
     
+    @staticmethod
+    def _item_key(item: ParsedOrderItem) -> tuple:
+        """Hashable stand-in for an item, equal exactly when the items compare equal."""
+        return (item.name, item.quantity, item.price, item.asin)
+    
+    @staticmethod
+    def _div_text_lengths(soup: BeautifulSoup) -> dict[int, int]:
+        """
+        Length of ``div.get_text()`` for every div, keyed by ``id(div)``.
+        
+        One pass over the document's strings, adding each to its enclosing
+        divs, instead of walking every div's subtree separately.
+        """
+        lengths: dict[int, int] = {}
+        for string in soup.strings:
+            size = len(string)
+            for parent in string.parents:
+                if parent.name == 'div':
+                    lengths[id(parent)] = lengths.get(id(parent), 0) + size
+        return lengths
+    
     def _parse_item_row(self, row) -> Optional[ParsedOrderItem]:
         """Parse individual item from table row."""
         try:
@@ -153,7 +194,7 @@ class AmazonEmailParser:
                 return None
             
             # Extract quantity
-            qty_match = re.search(r'(?:Qty|Quantity):?\s*(\d+)', text, re.IGNORECASE)
+            qty_match = self.QTY_PATTERN.search(text)
             quantity = int(qty_match.group(1)) if qty_match else 1
             
             # Extract price
@@ -169,8 +210,8 @@ class AmazonEmailParser:
             name = max(name_candidates, key=len) if name_candidates else ""
             
             # Clean name - remove price and qty text
-            name = re.sub(r'\$[\d,]+\.\d{2}', '', name)
-            name = re.sub(r'Qty:?\s*\d+', '', name, flags=re.IGNORECASE)
+            name = self.NAME_CLEAN_PRICE.sub('', name)
+            name = self.NAME_CLEAN_QTY.sub('', name)
             name = name.strip()
             
             if name and len(name) > 5 and price > 0:  # Sanity check
@@ -196,7 +237,7 @@ class AmazonEmailParser:
             price = float(price_match.group(1).replace(',', ''))
             
             # Extract quantity
-            qty_match = re.search(r'(?:Qty|Quantity):?\s*(\d+)', text, re.IGNORECASE)
+            qty_match = self.QTY_PATTERN.search(text)
             quantity = int(qty_match.group(1)) if qty_match else 1
             
             # Extract ASIN
@@ -205,9 +246,9 @@ class AmazonEmailParser:
             
             # Clean text for name
             name = text
-            name = re.sub(r'\$[\d,]+\.\d{2}', '', name)
-            name = re.sub(r'Qty:?\s*\d+', '', name, flags=re.IGNORECASE)
-            name = re.sub(r'ASIN:?\s*[A-Z0-9]{10}', '', name, flags=re.IGNORECASE)
+            name = self.NAME_CLEAN_PRICE.sub('', name)
+            name = self.NAME_CLEAN_QTY.sub('', name)
+            name = self.ASIN_PATTERN.sub('', name)
             name = ' '.join(name.split())  # Normalize whitespace
             name = name[:200]  # Limit length
             
@@ -226,6 +267,7 @@ class AmazonEmailParser:
     def _extract_items_from_full_text(self, text: str) -> list[ParsedOrderItem]:
         """Fallback method: extract items from full email text."""
         items = []
+        seen = set()
         
         # Split into lines and look for price patterns
         lines = text.split('\n')
@@ -238,32 +280,26 @@ class AmazonEmailParser:
                 context = ' '.join(lines[context_start:context_end])
                 
                 item = self._parse_item_from_text(context)
-                if item and item not in items:
+                key = item and self._item_key(item)
+                if item and key not in seen:
+                    seen.add(key)
                     items.append(item)
         
         return items[:20]  # Limit to avoid false positives
     
-    def _extract_total(self, soup: BeautifulSoup) -> float:
+    def _extract_total(self, text_content: str) -> float:
         """Extract order total."""
-        text_content = soup.get_text()
-        
         # Look for common total indicators
-        patterns = [
-            r'Order\s+Total:?\s*\$?([\d,]+\.\d{2})',
-            r'Grand\s+Total:?\s*\$?([\d,]+\.\d{2})',
-            r'Total:?\s*\$?([\d,]+\.\d{2})',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text_content, re.IGNORECASE)
+        for pattern in self.TOTAL_PATTERNS:
+            match = pattern.search(text_content)
             if match:
                 return float(match.group(1).replace(',', ''))
         
         return 0.0
     
-    def _extract_shipment_status(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_shipment_status(self, text_content: str) -> Optional[str]:
         """Extract shipment status if present."""
-        text_content = soup.get_text().lower()
+        text_content = text_content.lower()
         
         if 'delivered' in text_content:
             return 'Delivered'
@@ -294,7 +330,7 @@ class AmazonEmailParser:
         items = self._extract_items_from_full_text(text)
         
         # Extract total
-        total_match = re.search(r'(?:Order|Grand)?\s*Total:?\s*\$?([\d,]+\.\d{2})', text, re.IGNORECASE)
+        total_match = self.TEXT_TOTAL_PATTERN.search(text)
         total = float(total_match.group(1).replace(',', '')) if total_match else 0.0
         
         return ParsedAmazonOrder(
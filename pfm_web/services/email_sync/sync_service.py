@@ -8,6 +8,7 @@ from typing import Optional
 
 from sqlalchemy import text
 
+from ...amazon_importer import refresh_product_stats
 from ...extensions import db
 from ...models import AmazonOrder, AmazonOrderItem, User
 from .gmail_client import GmailClient
@@ -95,6 +96,8 @@ class EmailSyncService:
                     self._log_email_processing(email, 'failed', error=str(e))
             
             db.session.commit()
+            if stats['orders_created']:
+                refresh_product_stats()
             logger.info(f"Email sync completed: {stats}")
             
         except Exception as e:
@@ -141,7 +144,8 @@ class EmailSyncService:
             order_date=parsed_order.order_date,
             total_amount=parsed_order.total_amount,
             currency=parsed_order.currency,
-            shipment_status=parsed_order.shipment_status or 'Pending'
+            shipment_status=parsed_order.shipment_status or 'Pending',
+            item_count=len(parsed_order.items)
         )
         
         # Add source tracking if columns exist
@@ -49,6 +49,8 @@ class SpendingAnalyzer:
         user_id: Optional[int] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
+        source: Optional[str] = None,
+        currency: Optional[str] = None,
         limit: int = 100
     ) -> List[SpendingItem]:
         """
@@ -58,6 +60,8 @@ class SpendingAnalyzer:
             user_id: Filter by user ID (None for all users)
             start_date: Filter by start date
             end_date: Filter by end date
+            source: Only include this source ("receipt" or "amazon")
+            currency: Only include items in this currency
             limit: Maximum number of items to return
         
         Returns:
@@ -66,21 +70,10 @@ class SpendingAnalyzer:
         items = []
         
         # Get receipts
-        receipt_query = Receipt.query.options(
-            db.joinedload(Receipt.user),
-            db.joinedload(Receipt.shop),
-            db.joinedload(Receipt.category),
-            db.joinedload(Receipt.items),
-        )
-        
-        if user_id:
-            receipt_query = receipt_query.filter(Receipt.user_id == user_id)
-        if start_date:
-            receipt_query = receipt_query.filter(Receipt.issued_at >= start_date)
-        if end_date:
-            receipt_query = receipt_query.filter(Receipt.issued_at <= end_date)
-        
-        receipts = receipt_query.order_by(Receipt.issued_at.desc()).limit(limit).all()
+        if source not in (None, "receipt"):
+            receipts = []
+        else:
+            receipts = SpendingAnalyzer._get_receipts(user_id, start_date, end_date, currency, limit)
         
         for receipt in receipts:
             items.append(SpendingItem(
@@ -104,21 +97,10 @@ class SpendingAnalyzer:
             ))
         
         # Get Amazon orders
-        from ..models import AmazonOrderItem
-        amazon_query = AmazonOrder.query.options(
-            db.joinedload(AmazonOrder.user),
-            db.joinedload(AmazonOrder.items).joinedload(AmazonOrderItem.category),
-        )
-        
-        # Filter by user_id
-        if user_id:
-            amazon_query = amazon_query.filter(AmazonOrder.user_id == user_id)
-        if start_date:
-            amazon_query = amazon_query.filter(AmazonOrder.order_date >= start_date)
-        if end_date:
-            amazon_query = amazon_query.filter(AmazonOrder.order_date <= end_date)
-        
-        orders = amazon_query.order_by(AmazonOrder.order_date.desc()).limit(limit).all()
+        if source not in (None, "amazon"):
+            orders = []
+        else:
+            orders = SpendingAnalyzer._get_amazon_orders(user_id, start_date, end_date, currency, limit)
         
         for order in orders:
             # Determine category from items
@@ -151,6 +133,60 @@ class SpendingAnalyzer:
         # Apply overall limit
         return items[:limit]
     
+    @staticmethod
+    def _get_receipts(
+        user_id: Optional[int],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        currency: Optional[str],
+        limit: int
+    ) -> List[Receipt]:
+        """Newest receipts matching the filters, with the relations SpendingItem reads."""
+        receipt_query = Receipt.query.options(
+            db.joinedload(Receipt.user),
+            db.joinedload(Receipt.shop),
+            db.joinedload(Receipt.category),
+            db.joinedload(Receipt.items),
+        )
+        
+        if user_id:
+            receipt_query = receipt_query.filter(Receipt.user_id == user_id)
+        if start_date:
+            receipt_query = receipt_query.filter(Receipt.issued_at >= start_date)
+        if end_date:
+            receipt_query = receipt_query.filter(Receipt.issued_at <= end_date)
+        if currency:
+            receipt_query = receipt_query.filter(Receipt.currency == currency)
+        
+        return receipt_query.order_by(Receipt.issued_at.desc()).limit(limit).all()
+    
+    @staticmethod
+    def _get_amazon_orders(
+        user_id: Optional[int],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        currency: Optional[str],
+        limit: int
+    ) -> List[AmazonOrder]:
+        """Newest Amazon orders matching the filters, with the relations SpendingItem reads."""
+        from ..models import AmazonOrderItem
+        amazon_query = AmazonOrder.query.options(
+            db.joinedload(AmazonOrder.user),
+            db.joinedload(AmazonOrder.items).joinedload(AmazonOrderItem.category),
+        )
+        
+        # Filter by user_id
+        if user_id:
+            amazon_query = amazon_query.filter(AmazonOrder.user_id == user_id)
+        if start_date:
+            amazon_query = amazon_query.filter(AmazonOrder.order_date >= start_date)
+        if end_date:
+            amazon_query = amazon_query.filter(AmazonOrder.order_date <= end_date)
+        if currency:
+            amazon_query = amazon_query.filter(AmazonOrder.currency == currency)
+        
+        return amazon_query.order_by(AmazonOrder.order_date.desc()).limit(limit).all()
+    
     @staticmethod
     def get_spending_summary(
         user_id: Optional[int] = None,
@@ -0,0 +1,26 @@
+"""Helpers for streaming large JSON responses."""
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+from flask import Response, current_app, stream_with_context
+
+
+def stream_json_list(key: str, rows: Iterable[dict], tail: Callable[[], dict]) -> Response:
+    """
+    Stream ``{key: [rows...], **tail()}`` as JSON one row at a time.
+
+    ``tail`` is called after the last row so it can report values gathered
+    while streaming. Rows go through ``app.json``, so the body matches what
+    ``jsonify`` would produce (without indentation), and the server sends it
+    chunked since no length is known up front.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield '{"%s": [' % key
+        for index, row in enumerate(rows):
+            yield ("," if index else "") + dumps(row)
+        yield "], " + dumps(tail())[1:]
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
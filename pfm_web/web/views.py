@@ -44,16 +44,13 @@ def unified_spending():
         except ValueError:
             pass
     
-    # Get unified spending data
-    items = SpendingAnalyzer.get_unified_spending(user_id=user_id, limit=200)
-    
-    # Apply source filter
-    if source_filter != 'all':
-        items = [item for item in items if item.source == source_filter]
-    
-    # Apply currency filter
-    if currency_filter != 'all':
-        items = [item for item in items if item.currency == currency_filter]
+    # Get unified spending data, letting the database apply the source/currency filters
+    items = SpendingAnalyzer.get_unified_spending(
+        user_id=user_id,
+        source=None if source_filter == 'all' else source_filter,
+        currency=None if currency_filter == 'all' else currency_filter,
+        limit=200
+    )
     
     # Get unique currencies from all items for dropdown
     currencies = sorted(set(item.currency for item in items))
@@ -156,12 +153,14 @@ def receipt_create():
                 tax_amount=float(tax_amount) if tax_amount else None,
                 payment_method=payment_method,
                 category_id=int(category_id) if category_id else None,
-                shop_id=int(shop_id) if shop_id else None,
                 status="completed",
                 processing_engine="manual_entry",
                 confidence_score=1.0
             )
             
+            if shop_id:
+                receipt.set_shop(db.session.get(Shop, int(shop_id)))
+            
             db.session.add(receipt)
             db.session.flush()  # Get receipt ID
             
@@ -214,7 +213,8 @@ def receipt_create():
 def receipt_detail(receipt_id: int):
     receipt = (
         Receipt.query.options(
-            selectinload(Receipt.items),
+            # The items table shows each item's category
+            selectinload(Receipt.items).selectinload(ReceiptLineItem.category),
             selectinload(Receipt.shop),
             selectinload(Receipt.category),
         )
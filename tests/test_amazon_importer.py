@@ -0,0 +1,114 @@
+"""Tests for the Amazon order CSV importer."""
+import csv
+
+import pytest
+
+from pfm_web import amazon_importer, create_app
+from pfm_web.extensions import db
+from pfm_web.models import AmazonOrder
+
+CSV_FIELDS = [
+    "Website", "Order ID", "Order Date", "Currency", "Unit Price", "Unit Price Tax",
+    "Total Owed", "Shipment Item Subtotal", "ASIN", "Product Condition", "Quantity",
+    "Payment Instrument Type", "Order Status", "Shipment Status", "Ship Date",
+    "Shipping Address", "Product Name",
+]
+
+# Order 111-1 is split across rows 1 and 3
+ROWS = [
+    ("111-1", "Coffee beans", "10.0"),
+    ("222-2", "USB cable", "5.0"),
+    ("111-1", "Novel book", "10.0"),
+    ("333-3", "Shampoo", "7.5"),
+]
+
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "Retail.OrderHistory.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for order_id, product_name, price in ROWS:
+            writer.writerow({
+                "Website": "Amazon.com",
+                "Order ID": order_id,
+                "Order Date": "2024-03-01T10:00:00Z",
+                "Currency": "USD",
+                "Unit Price": price,
+                "Unit Price Tax": "0",
+                "Total Owed": price,
+                "Shipment Item Subtotal": price,
+                "ASIN": "B000000000",
+                "Product Condition": "New",
+                "Quantity": "1",
+                "Payment Instrument Type": "Visa",
+                "Order Status": "Closed",
+                "Shipment Status": "Shipped",
+                "Ship Date": "2024-03-02T10:00:00Z",
+                "Shipping Address": "Somewhere",
+                "Product Name": product_name,
+            })
+    return path
+
+
+@pytest.mark.parametrize("batch_size", [500, 1])
+def test_import_merges_non_contiguous_order_rows(app, csv_path, monkeypatch, batch_size):
+    monkeypatch.setattr(amazon_importer, "BATCH_SIZE", batch_size)
+
+    result = amazon_importer.import_amazon_csv(csv_path)
+
+    assert result.orders_created == 3
+    assert result.orders_skipped == 0
+    assert result.items_created == 4
+
+    order = db.session.execute(
+        db.select(AmazonOrder).filter_by(order_number="111-1")
+    ).scalar_one()
+    assert order.total_amount == pytest.approx(20.0)
+    assert order.item_count == 2
+    assert sorted(item.item_name for item in order.items) == ["Coffee beans", "Novel book"]
+
+
+@pytest.mark.parametrize("parser", ["pyarrow", "csv"])
+def test_iter_csv_rows_parsers_agree(tmp_path, monkeypatch, parser):
+    if parser == "pyarrow":
+        pytest.importorskip("pyarrow")
+    else:
+        monkeypatch.setattr(amazon_importer, "pacsv", None)
+    path = tmp_path / "rows.csv"
+    # BOM, a quoted multi-line value, a short row and a long row
+    path.write_bytes(
+        b'\xef\xbb\xbfOrder ID,Shipping Address,Product Name\n'
+        b'111-1,"1 Main St\nSpringfield",Coffee beans\n'
+        b'222-2,Somewhere\n'
+        b'333-3,Elsewhere,Shampoo,extra\n'
+    )
+
+    rows = list(amazon_importer._iter_csv_rows(path))
+
+    assert sorted(rows, key=lambda row: row["Order ID"]) == [
+        {"Order ID": "111-1", "Shipping Address": "1 Main St\nSpringfield", "Product Name": "Coffee beans"},
+        {"Order ID": "222-2", "Shipping Address": "Somewhere", "Product Name": None},
+        {"Order ID": "333-3", "Shipping Address": "Elsewhere", "Product Name": "Shampoo", None: ["extra"]},
+    ]
+
+
+def test_reimport_skips_non_contiguous_order_once(app, csv_path):
+    amazon_importer.import_amazon_csv(csv_path)
+
+    result = amazon_importer.import_amazon_csv(csv_path)
+
+    assert result.orders_created == 0
+    assert result.orders_skipped == 3
+    assert result.items_created == 0